@@ -1,5 +1,9 @@
 # 京东测试开发补充算法题
 
+from allocation_optimizer import maximize_allocation
+from inventory_engine import FULFILLED, INSUFFICIENT, InventoryEngine
+from linear_recurrence import LinearRecurrence
+
 ## 栈和队列相关
 
 def is_valid_parentheses(s):
@@ -24,6 +28,7 @@ def implement_queue_using_stacks():
     """
     用栈实现队列 (LeetCode 232)
     考察数据结构转换能力
+    线程安全、带容量上限、支持 asyncio 的版本见 stack_queue.TwoStackQueue
     """
     class MyQueue:
         def __init__(self):
@@ -151,6 +156,7 @@ def first_unique_char(s):
     """
     字符串中的第一个唯一字符 (LeetCode 387)
     考察哈希表统计应用
+    无界事件流上随时查询第一个唯一元素见 first_unique_tracker.FirstUniqueTracker
     """
     char_count = {}
     
@@ -167,27 +173,23 @@ def first_unique_char(s):
 
 ## 动态规划入门
 
-def climb_stairs(n):
+def climb_stairs(n, modulus=None):
     """
     爬楼梯 (LeetCode 70)
     京东面试动态规划入门题
+    dp[i] = dp[i-1] + dp[i-2] 是线性递推，交给 linear_recurrence 用多项式快速幂 O(log n) 求值，
+    n = 10^18 也能立即得到结果(需要传 modulus)；其他步长组合见 linear_recurrence.climb_stairs_ways
     """
     if n <= 2:
         return n
-    
-    dp = [0] * (n + 1)
-    dp[1] = 1
-    dp[2] = 2
-    
-    for i in range(3, n + 1):
-        dp[i] = dp[i-1] + dp[i-2]
-    
-    return dp[n]
+
+    return LinearRecurrence.from_steps((1, 2), modulus).term(n)
 
 def max_subarray(nums):
     """
     最大子序和 (LeetCode 53)
     京东面试经典DP题
+    大数组/文件分段多进程计算、增量追加和二维子矩阵见 max_subarray_parallel
     """
     if not nums:
         return 0
@@ -202,48 +204,64 @@ def max_subarray(nums):
 
 ## 京东电商场景算法
 
-def calculate_discount(price, discount_type, discount_value):
+def calculate_discount(price, discount_type, discount_value, quantity=1):
     """
     电商促销价格计算
     京东业务场景算法题
+    price 为单价，返回 quantity 件商品的应付金额；
+    buy_x_get_y 的 discount_value 为 (x, y)，即每买 x 件送 y 件(x >= 1, y >= 0)
+    多条促销叠加、整车/批量计价见 promotion_engine.PromotionEngine
     """
     if discount_type == 'percentage':
-        return price * (1 - discount_value / 100)
+        return price * (1 - discount_value / 100) * quantity
     elif discount_type == 'fixed':
-        return max(price - discount_value, 0)
+        return max(price * quantity - discount_value, 0)
     elif discount_type == 'buy_x_get_y':
-        # 买X送Y逻辑
-        return price  # 简化实现
+        if not isinstance(discount_value, (tuple, list)) or len(discount_value) != 2:
+            raise ValueError("buy_x_get_y requires discount_value=(x, y)")
+        x, y = discount_value
+        if x < 1 or y < 0:
+            raise ValueError("buy_x_get_y requires x >= 1 and y >= 0")
+        # 每 x + y 件为一组，每组免付 y 件，不足一组的按原价
+        return price * (quantity - quantity // (x + y) * y)
     else:
-        return price
+        return price * quantity
+
+def _positive_orders(orders):
+    """
+    分配器只接受正数数量：数量为 0 的商品行不占库存，去掉；含负数数量的订单无法满足，整单去掉
+    """
+    return {order_id: {item_id: quantity for item_id, quantity in order_items.items() if quantity}
+            for order_id, order_items in orders.items()
+            if all(quantity >= 0 for quantity in order_items.values())}
+
 
-def inventory_allocation(inventory, orders):
+def inventory_allocation(inventory, orders, mode='fcfs', **options):
     """
     库存分配算法
     京东核心业务逻辑
+    mode='fcfs': 按订单顺序分配，一个订单的商品要么全部满足、要么一件都不分配，
+        实际分配由 inventory_engine.InventoryEngine 完成，需要常驻、并发分配时直接使用引擎
+    mode='maximize': 批量分配，不看顺序，最大化满足的订单数或总价值，
+        options 见 allocation_optimizer.maximize_allocation
+    库存和订单数量都必须是整数，库存为小数或负数时抛出 ValueError；
+    两种模式都忽略数量为 0 的商品行，含负数数量的订单不分配
     """
+    valid_orders = _positive_orders(orders)
+    if mode == 'maximize':
+        statuses, remaining_inventory, _ = maximize_allocation(inventory, valid_orders, **options)
+    elif mode == 'fcfs':
+        engine = InventoryEngine(inventory, track_latency=False)
+        statuses = engine.allocate_batch(valid_orders)
+        remaining_inventory = engine.remaining()
+    else:
+        raise ValueError(f"unknown allocation mode: {mode}")
+
     allocation_result = {}
-    remaining_inventory = inventory.copy()
-    
     for order_id, order_items in orders.items():
-        can_fulfill = True
-        allocation = {}
-        
-        # 检查库存是否充足
-        for item_id, quantity in order_items.items():
-            if remaining_inventory.get(item_id, 0) < quantity:
-                can_fulfill = False
-                break
-        
-        if can_fulfill:
-            # 分配库存
-            for item_id, quantity in order_items.items():
-                remaining_inventory[item_id] -= quantity
-                allocation[item_id] = quantity
-            allocation_result[order_id] = {'status': 'fulfilled', 'allocation': allocation}
-        else:
-            allocation_result[order_id] = {'status': 'insufficient_inventory', 'allocation': {}}
-    
+        status = statuses[order_id]['status'] if order_id in statuses else INSUFFICIENT
+        allocation_result[order_id] = {'status': status,
+                                       'allocation': dict(order_items) if status == FULFILLED else {}}
     return allocation_result, remaining_inventory
 
 # 测试用例
@@ -301,5 +319,13 @@ def test_advanced_algorithms():
     print(f"分配结果: {allocation}")
     print(f"剩余库存: {remaining}")
 
+    allocation, remaining = inventory_allocation(inventory, orders, mode='maximize')
+    print(f"最大化履约分配结果: {allocation}")
+    
+    print("\n7. 促销价格计算测试")
+    print(f"100元打8折: {calculate_discount(100, 'percentage', 20)}")
+    print(f"100元立减30: {calculate_discount(100, 'fixed', 30)}")
+    print(f"单价50买2送1，买3件: {calculate_discount(50, 'buy_x_get_y', (2, 1), quantity=3)}")
+
 if __name__ == "__main__":
     test_advanced_algorithms()
\ No newline at end of file
@@ -0,0 +1,251 @@
+# 京东测试开发 - 最大化履约的批量库存分配
+#
+# inventory_allocation 先到先得(FCFS)：排在前面的一个大订单可能吃掉稀缺商品的全部库存，
+# 后面几十个小订单都无法满足。批量分配(比如大促零点的预售尾款订单)时顺序并不重要，
+# 目标是在库存约束下满足尽可能多的订单(或订单总价值尽可能高)。
+# 这是多维背包问题，精确求解是 NP 难的，这里用可扩展的启发式：
+#   1. 贪心：每个 SKU 的超卖倍数 pressure = 总需求 / 库存，订单的代价为
+#      sum(数量 / 库存 * max(pressure, 1))，即占用稀缺库存的比例；按 价值 / 代价 从高到低依次分配
+#   2. 局部改进(1 换多)：在时间预算内，依次尝试撤掉一个代价大的已满足订单，
+#      用释放的库存满足涉及相同 SKU 的未满足订单，总价值增加才保留
+# 订单数据编译成 array 平铺存储，100 万订单 × 10 万 SKU 在普通机器上几十秒内完成。
+
+import time
+from array import array
+from numbers import Integral
+
+FULFILLED = 'fulfilled'
+INSUFFICIENT = 'insufficient_inventory'
+
+
+class _CompiledOrders:
+    """订单平铺存储：第 o 个订单的商品是 line_sku/line_qty[offsets[o]:offsets[o + 1]]"""
+
+    def __init__(self, inventory, orders, order_values):
+        for sku, quantity in inventory.items():
+            if not isinstance(quantity, Integral) or quantity < 0:
+                raise ValueError(f"stock of {sku!r} must be a non-negative integer, got {quantity!r}")
+        self.skus = list(inventory)
+        index = {sku: i for i, sku in enumerate(self.skus)}
+        self.stock = array('q', inventory.values())
+        self.order_ids = list(orders)
+        self.offsets = array('q', [0])
+        self.line_sku = array('q')
+        self.line_qty = array('q')
+        self.values = array('d')
+        # 单个商品数量就超过库存(或 SKU 不存在)的订单无论如何都满足不了
+        self.feasible = bytearray(len(self.order_ids))
+
+        stock = self.stock
+        for o, order_id in enumerate(self.order_ids):
+            ok = True
+            for sku, quantity in orders[order_id].items():
+                if not isinstance(quantity, Integral) or quantity <= 0:
+                    raise ValueError(f"quantity of {sku!r} must be a positive integer, got {quantity!r}")
+                i = index.get(sku, -1)
+                if i < 0 or quantity > stock[i]:
+                    ok = False
+                self.line_sku.append(i)
+                self.line_qty.append(quantity)
+            self.offsets.append(len(self.line_sku))
+            value = 1 if order_values is None else order_values.get(order_id, 0)
+            if value < 0:
+                raise ValueError(f"value of order {order_id!r} must be non-negative")
+            self.values.append(value)
+            self.feasible[o] = ok
+
+    def fits(self, o, stock):
+        line_sku, line_qty = self.line_sku, self.line_qty
+        for j in range(self.offsets[o], self.offsets[o + 1]):
+            if stock[line_sku[j]] < line_qty[j]:
+                return False
+        return True
+
+    def take(self, o, stock, sign=1):
+        line_sku, line_qty = self.line_sku, self.line_qty
+        for j in range(self.offsets[o], self.offsets[o + 1]):
+            stock[line_sku[j]] -= sign * line_qty[j]
+
+
+def _fcfs(compiled):
+    """先到先得的基准结果，返回满足标记"""
+    stock = array('q', compiled.stock)
+    status = bytearray(len(compiled.order_ids))
+    for o in range(len(status)):
+        if compiled.feasible[o] and compiled.fits(o, stock):
+            compiled.take(o, stock)
+            status[o] = 1
+    return status
+
+
+def _order_costs(compiled):
+    """按 SKU 超卖倍数加权的库存占用比例"""
+    demand = array('q', bytes(8 * len(compiled.stock)))
+    line_sku, line_qty, offsets = compiled.line_sku, compiled.line_qty, compiled.offsets
+    for o, ok in enumerate(compiled.feasible):
+        if ok:
+            for j in range(offsets[o], offsets[o + 1]):
+                demand[line_sku[j]] += line_qty[j]
+
+    # 可行订单涉及的 SKU 库存一定大于 0
+    weight = array('d', (max(d / s, 1.0) / s if d else 0.0 for d, s in zip(demand, compiled.stock)))
+    costs = array('d', bytes(8 * len(compiled.order_ids)))
+    for o, ok in enumerate(compiled.feasible):
+        if ok:
+            costs[o] = sum(line_qty[j] * weight[line_sku[j]] for j in range(offsets[o], offsets[o + 1]))
+    return costs
+
+
+def _improve(compiled, status, stock, costs, priority, deadline, max_candidates):
+    """1 换多局部改进，返回成功交换的次数"""
+    offsets, line_sku, values = compiled.offsets, compiled.line_sku, compiled.values
+    rejected_by_sku = {}
+    for o, ok in enumerate(compiled.feasible):
+        if ok and not status[o]:
+            for j in range(offsets[o], offsets[o + 1]):
+                rejected_by_sku.setdefault(line_sku[j], []).append(o)
+    if not rejected_by_sku:
+        return 0
+
+    # 只有涉及被争抢 SKU 的已满足订单才值得尝试
+    accepted = [o for o, s in enumerate(status)
+                if s and any(line_sku[j] in rejected_by_sku for j in range(offsets[o], offsets[o + 1]))]
+    accepted.sort(key=lambda o: costs[o] / (values[o] or 1e-9), reverse=True)
+
+    swaps = 0
+    for a in accepted:
+        if time.perf_counter() > deadline:
+            break
+        if not status[a]:
+            continue
+        compiled.take(a, stock, -1)
+        candidates = set()
+        for j in range(offsets[a], offsets[a + 1]):
+            for r in rejected_by_sku.get(line_sku[j], ()):
+                if not status[r]:
+                    candidates.add(r)
+        candidates = sorted(candidates, key=priority, reverse=True)[:max_candidates]
+
+        added = []
+        gained = 0
+        for r in candidates:
+            if compiled.fits(r, stock):
+                compiled.take(r, stock)
+                status[r] = 1
+                added.append(r)
+                gained += values[r]
+
+        if gained > values[a]:
+            status[a] = 0
+            swaps += 1
+        else:
+            for r in added:
+                compiled.take(r, stock, -1)
+                status[r] = 0
+            compiled.take(a, stock)
+    return swaps
+
+
+def maximize_allocation(inventory, orders, order_values=None, time_budget=30.0, max_candidates=64):
+    """
+    批量分配，最大化满足的订单数(order_values 为 None)或订单总价值(order_values 为 {订单号: 价值})
+    time_budget: 总耗时预算(秒)，贪心阶段一定完成，剩余时间用于局部改进
+    返回 (分配结果, 剩余库存, 报告)，分配结果格式与 inventory_allocation 相同；
+    报告对比了同一批订单按 FCFS 分配的结果
+    """
+    begin = time.perf_counter()
+    compiled = _CompiledOrders(inventory, orders, order_values)
+    values = compiled.values
+    fcfs = _fcfs(compiled)
+
+    costs = _order_costs(compiled)
+
+    def priority(o):
+        cost = costs[o]
+        return values[o] / cost if cost else float('inf')
+
+    stock = array('q', compiled.stock)
+    status = bytearray(len(compiled.order_ids))
+    for o in sorted((o for o, ok in enumerate(compiled.feasible) if ok), key=priority, reverse=True):
+        if compiled.fits(o, stock):
+            compiled.take(o, stock)
+            status[o] = 1
+    greedy_value = sum(values[o] for o, s in enumerate(status) if s)
+
+    swaps = _improve(compiled, status, stock, costs, priority, begin + time_budget, max_candidates)
+
+    result = {}
+    for o, order_id in enumerate(compiled.order_ids):
+        if status[o]:
+            result[order_id] = {'status': FULFILLED, 'allocation': dict(orders[order_id])}
+        else:
+            result[order_id] = {'status': INSUFFICIENT, 'allocation': {}}
+    remaining = dict(zip(compiled.skus, stock))
+
+    report = {
+        'objective': 'count' if order_values is None else 'value',
+        'fulfilled': sum(status),
+        'value': sum(values[o] for o, s in enumerate(status) if s),
+        'greedy_value': greedy_value,
+        'fcfs_fulfilled': sum(fcfs),
+        'fcfs_value': sum(values[o] for o, s in enumerate(fcfs) if s),
+        'swaps': swaps,
+        'seconds': time.perf_counter() - begin,
+    }
+    report['improvement'] = report['value'] - report['fcfs_value']
+    return result, remaining, report
+
+
+def benchmark_allocation(order_count=10 ** 6, sku_count=10 ** 5, time_budget=60.0, seed=0):
+    """生成热门 SKU 被严重超卖的订单批次，对比 FCFS 与最大化履约"""
+    import random
+
+    rng = random.Random(seed)
+    skus = [f'sku{i}' for i in range(sku_count)]
+    inventory = {sku: rng.randint(0, 50) for sku in skus}
+    hot = skus[:max(1, sku_count // 100)]  # 1% 的爆款 SKU 承担大部分需求
+    orders = {}
+    for o in range(order_count):
+        items = {}
+        for _ in range(rng.randint(1, 4)):
+            sku = rng.choice(hot) if rng.random() < 0.5 else rng.choice(skus)
+            items[sku] = rng.choice((1, 1, 1, 2, 3, 10))
+        orders[f'order{o}'] = items
+
+    _, _, report = maximize_allocation(inventory, orders, time_budget=time_budget)
+    print(f"{order_count:,} 个订单 × {sku_count:,} 个 SKU，耗时 {report['seconds']:.1f}s")
+    print(f"FCFS 满足 {report['fcfs_fulfilled']:,} 单，贪心 {report['greedy_value']:,.0f} 单，"
+          f"局部改进后 {report['fulfilled']:,} 单(交换 {report['swaps']} 次)")
+    return report
+
+
+# 测试用例
+def test_allocation_optimizer():
+    print("=== 最大化履约的批量库存分配测试 ===")
+
+    # 一个大订单排在最前面，FCFS 下后面的小订单全部缺货
+    inventory = {'phone': 10, 'case': 100}
+    orders = {'big': {'phone': 10}}
+    orders.update({f'small{i}': {'phone': 2, 'case': 1} for i in range(5)})
+    result, remaining, report = maximize_allocation(inventory, orders)
+    print(f"满足的订单: {[o for o, r in result.items() if r['status'] == FULFILLED]}")
+    print(f"剩余库存: {remaining}")
+    print(f"FCFS 满足 {report['fcfs_fulfilled']} 单，最大化后满足 {report['fulfilled']} 单")
+
+    # 按订单价值优化时，大订单更值钱就保留大订单
+    values = {'big': 1000, **{f'small{i}': 100 for i in range(5)}}
+    _, _, report = maximize_allocation(inventory, orders, order_values=values)
+    print(f"按价值: FCFS {report['fcfs_value']:.0f}，最大化后 {report['value']:.0f}")
+
+    print()
+    benchmark_allocation(order_count=50000, sku_count=5000, time_budget=5)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python allocation_optimizer.py bench 跑 100 万订单 × 10 万 SKU
+    if sys.argv[1:] == ['bench']:
+        benchmark_allocation()
+    else:
+        test_allocation_optimizer()
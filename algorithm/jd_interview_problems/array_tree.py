@@ -0,0 +1,217 @@
+# 京东测试开发 - 数组存储的二叉树
+#
+# advanced_algorithms.TreeNode 每个节点一个 Python 对象(对象头 + __dict__ + 值对象，一百多字节)，
+# max_depth 是递归实现，退化成链表的深树超过递归深度上限(默认 1000)就会崩溃。
+# 这里用三个平行的整数数组存储整棵树：值 vals、左孩子下标 left、右孩子下标 right(-1 表示没有)，
+# 每个节点只占 16 字节，1000 万个节点约 160MB。
+# 节点始终按层序编号(根为 0，同一层的节点下标连续)，所以：
+#   - 从 LeetCode 层序列表 [3, 9, 20, None, None, 15, 7] 构建只需顺序扫描一遍，父节点就是一个递增的下标
+#   - 每一层是一个连续的下标区间，max_depth / level_order 只需逐层推进区间，不递归也不需要队列
+# dumps/loads 直接写出/读入数组的原始字节，序列化不经过逐个节点的 Python 对象。
+
+import sys
+from array import array
+
+NO_CHILD = -1
+MAGIC = b'ATREE1'
+
+
+class ArrayTree:
+    """
+    数组存储的二叉树，节点按层序编号
+    value_typecode: 节点值的 array 类型码，默认 'q'(64 位整数)
+    """
+
+    def __init__(self, value_typecode='q'):
+        self.vals = array(value_typecode)
+        self.left = array('i')
+        self.right = array('i')
+
+    def __len__(self):
+        return len(self.vals)
+
+    def _add(self, value):
+        self.vals.append(value)
+        self.left.append(NO_CHILD)
+        self.right.append(NO_CHILD)
+        return len(self.vals) - 1
+
+    @classmethod
+    def from_level_order(cls, values, value_typecode='q'):
+        """从 LeetCode 层序列表构建，values 可以是任意可迭代对象(比如逐行读取的生成器)"""
+        tree = cls(value_typecode)
+        items = iter(values)
+        root = next(items, None)
+        if root is None:
+            return tree
+        tree._add(root)
+        vals, left, right = tree.vals, tree.left, tree.right
+        parent = 0
+        for value in items:
+            # 层序列表中的孩子依次属于按层序排列的非空节点，每个父节点先左后右占两个位置
+            if parent >= len(vals):
+                raise ValueError("level-order list has children without a parent")
+            if value is not None:
+                left[parent] = len(vals)
+                vals.append(value)
+                left.append(NO_CHILD)
+                right.append(NO_CHILD)
+            value = next(items, None)
+            if value is not None:
+                right[parent] = len(vals)
+                vals.append(value)
+                left.append(NO_CHILD)
+                right.append(NO_CHILD)
+            parent += 1
+        return tree
+
+    @classmethod
+    def from_tree_node(cls, root, value_typecode='q'):
+        """从 TreeNode 链式结构转换，按层序重新编号"""
+        tree = cls(value_typecode)
+        if root is None:
+            return tree
+        nodes = [root]
+        tree._add(root.val)
+        head = 0
+        while head < len(nodes):
+            node = nodes[head]
+            if node.left is not None:
+                tree.left[head] = tree._add(node.left.val)
+                nodes.append(node.left)
+            if node.right is not None:
+                tree.right[head] = tree._add(node.right.val)
+                nodes.append(node.right)
+            head += 1
+        return tree
+
+    def to_tree_node(self):
+        """转换回 TreeNode，用于与 advanced_algorithms 中的函数对比"""
+        from advanced_algorithms import TreeNode
+
+        if not self.vals:
+            return None
+        nodes = [TreeNode(value) for value in self.vals]
+        for i, node in enumerate(nodes):
+            if self.left[i] != NO_CHILD:
+                node.left = nodes[self.left[i]]
+            if self.right[i] != NO_CHILD:
+                node.right = nodes[self.right[i]]
+        return nodes[0]
+
+    def iter_level_order(self):
+        """逐个产出 LeetCode 层序列表的元素，末尾多余的 None 已去掉"""
+        vals, left, right = self.vals, self.left, self.right
+        if not vals:
+            return
+        yield vals[0]
+        pending_none = 0
+        for i in range(len(vals)):
+            for child in (left[i], right[i]):
+                if child == NO_CHILD:
+                    pending_none += 1
+                else:
+                    for _ in range(pending_none):
+                        yield None
+                    pending_none = 0
+                    yield vals[child]
+
+    def to_level_order(self):
+        return list(self.iter_level_order())
+
+    def iter_levels(self):
+        """逐层产出 (起始下标, 结束下标)，同一层节点的下标连续"""
+        left, right = self.left, self.right
+        begin, end = 0, len(self.vals) and 1
+        while begin < end:
+            children = 0
+            for i in range(begin, end):
+                children += (left[i] != NO_CHILD) + (right[i] != NO_CHILD)
+            yield begin, end
+            begin, end = end, end + children
+
+    def max_depth(self):
+        """二叉树的最大深度，逐层推进，不递归"""
+        return sum(1 for _ in self.iter_levels())
+
+    def level_order(self):
+        """二叉树的层序遍历，返回值与 advanced_algorithms.level_order 相同"""
+        return [self.vals[begin:end].tolist() for begin, end in self.iter_levels()]
+
+    def nbytes(self):
+        """三个数组占用的字节数"""
+        return sum(a.itemsize * len(a) for a in (self.vals, self.left, self.right))
+
+    def dumps(self):
+        """序列化为字节串：魔数 + 值类型码 + 节点数 + 三个数组的原始字节(小端)"""
+        arrays = [self.vals, self.left, self.right]
+        if sys.byteorder == 'big':
+            arrays = [array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        header = MAGIC + self.vals.typecode.encode('ascii') + len(self.vals).to_bytes(8, 'little')
+        return header + b''.join(a.tobytes() for a in arrays)
+
+    @classmethod
+    def loads(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an ArrayTree payload")
+        offset = len(MAGIC)
+        tree = cls(chr(data[offset]))
+        count = int.from_bytes(data[offset + 1:offset + 9], 'little')
+        offset += 9
+        for a in (tree.vals, tree.left, tree.right):
+            size = a.itemsize * count
+            a.frombytes(data[offset:offset + size])
+            if sys.byteorder == 'big':
+                a.byteswap()
+            offset += size
+        if offset != len(data):
+            raise ValueError("corrupted ArrayTree payload")
+        return tree
+
+
+# 测试用例
+def test_array_tree():
+    import time
+    import tracemalloc
+    from advanced_algorithms import level_order, max_depth
+
+    print("=== 数组存储的二叉树测试 ===")
+
+    tree = ArrayTree.from_level_order([3, 9, 20, None, None, 15, 7])
+    print(f"最大深度: {tree.max_depth()}, 层序遍历: {tree.level_order()}")
+    print(f"序列化回层序列表: {tree.to_level_order()}")
+    node = tree.to_tree_node()
+    print(f"与 TreeNode 版本一致: {max_depth(node) == tree.max_depth() and level_order(node) == tree.level_order()}")
+    print(f"dumps/loads 往返一致: {ArrayTree.loads(tree.dumps()).to_level_order() == tree.to_level_order()}")
+
+    # 退化成链表的深树：递归版本超过递归深度上限
+    depth = 100000
+    chain = [1]
+    for value in range(2, depth + 1):
+        chain += [None, value]
+    skewed = ArrayTree.from_level_order(chain)
+    try:
+        max_depth(skewed.to_tree_node())
+        recursive = 'ok'
+    except RecursionError:
+        recursive = 'RecursionError'
+    print(f"深度 {depth} 的链状树: ArrayTree.max_depth={skewed.max_depth()}, 递归 max_depth: {recursive}")
+
+    # 内存对比：完全二叉树
+    count = 200000
+    tracemalloc.start()
+    nodes = ArrayTree.from_level_order(range(count)).to_tree_node()
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    del nodes
+    tracemalloc.stop()
+    begin = time.perf_counter()
+    tree = ArrayTree.from_level_order(range(count))
+    build = time.perf_counter() - begin
+    print(f"{count} 个节点: TreeNode 约 {object_bytes / count:.0f} 字节/节点, "
+          f"ArrayTree {tree.nbytes() / count:.0f} 字节/节点, 构建 {build:.3f}s, 深度 {tree.max_depth()}")
+
+
+if __name__ == "__main__":
+    test_array_tree()
@@ -0,0 +1,193 @@
+# 京东测试开发 - 组合测试用例生成(pairwise / n-wise)
+#
+# generate_boundary_test_cases 只能处理一个整数区间。
+# 真实接口往往有几十个参数，全组合 7^50 个用例不可能执行，
+# n-wise 覆盖要求任意 n 个参数的任意取值组合至少出现在一个用例中，用例数量只随参数个数对数增长。
+#
+# 这里用贪心构造(AETG 的思路)，一次生成一个用例并立即产出(生成器)，不把整个用例集放在内存里：
+#   1. 先选一个还没覆盖的取值组合放进用例，保证每个用例至少覆盖一个新组合
+#   2. 其余参数按随机顺序逐个确定取值，选能新覆盖最多组合的值
+#   3. 所有组合都覆盖后停止
+# pairwise(n=2) 用位掩码记录每对参数之间尚未覆盖的取值对，50 个参数 × 7 个取值在 1 秒内完成。
+
+import random
+from itertools import combinations
+
+from test_scenario_algorithms import generate_boundary_test_cases
+
+
+def parameter_values(spec):
+    """
+    把参数定义展开成取值列表
+    spec 为列表/元组时直接作为等价类的代表值；
+    spec 为 dict 时按 generate_boundary_test_cases 生成边界值：
+        {'min': 1, 'max': 100, 'invalid': True} -> 有效边界值 + 边界外的无效值
+    """
+    if isinstance(spec, dict):
+        cases = generate_boundary_test_cases(spec['min'], spec['max'])
+        values = cases['valid_boundary_cases']
+        if spec.get('invalid', False):
+            values = values + cases['invalid_cases']
+    else:
+        values = list(spec)
+    # 区间很小时边界值会重复，去重并保持顺序
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise ValueError("parameter must have at least one value")
+    return values
+
+
+def _iter_pairwise(domains, rng):
+    """pairwise 快速路径，domains[i] 为第 i 个参数的取值个数，产出取值下标列表"""
+    k = len(domains)
+    # uncovered[p][a][q]：参数 p 取 a 时，参数 q 还有哪些取值没有和它组合过(位掩码)
+    uncovered = [[[(1 << domains[q]) - 1 if q != p else 0 for q in range(k)]
+                  for _ in range(domains[p])] for p in range(k)]
+    remaining = sum(domains[p] * domains[q] for p, q in combinations(range(k), 2))
+    order = list(range(k))
+
+    while remaining:
+        case = [None] * k
+        # 1. 找一个尚未覆盖的取值对作为种子
+        for p, q in combinations(range(k), 2):
+            seed = next(((a, mask) for a, row in enumerate(uncovered[p]) if (mask := row[q])), None)
+            if seed is not None:
+                a, mask = seed
+                case[p], case[q] = a, (mask & -mask).bit_length() - 1
+                break
+
+        # 2. 其余参数贪心选值
+        rng.shuffle(order)
+        chosen = [p for p in range(k) if case[p] is not None]
+        for p in order:
+            if case[p] is not None:
+                continue
+            scores = [0] * domains[p]
+            for q in chosen:
+                mask = uncovered[q][case[q]][p]
+                while mask:
+                    low = mask & -mask
+                    scores[low.bit_length() - 1] += 1
+                    mask ^= low
+            best = max(scores)
+            candidates = [a for a, score in enumerate(scores) if score == best]
+            case[p] = candidates[0] if len(candidates) == 1 else rng.choice(candidates)
+            chosen.append(p)
+
+        # 3. 标记这个用例覆盖的取值对
+        for p, q in combinations(range(k), 2):
+            a, b = case[p], case[q]
+            if uncovered[p][a][q] >> b & 1:
+                uncovered[p][a][q] &= ~(1 << b)
+                uncovered[q][b][p] &= ~(1 << a)
+                remaining -= 1
+        yield case
+
+
+def _iter_nwise(domains, strength, rng):
+    """通用 n-wise 路径：用集合记录每组参数尚未覆盖的取值组合"""
+    from itertools import product
+
+    k = len(domains)
+    uncovered = {combo: set(product(*(range(domains[p]) for p in combo)))
+                 for combo in combinations(range(k), strength)}
+    remaining = sum(len(values) for values in uncovered.values())
+    order = list(range(k))
+
+    while remaining:
+        case = [None] * k
+        combo, values = next((c, v) for c, v in uncovered.items() if v)
+        for p, a in zip(combo, next(iter(values))):
+            case[p] = a
+
+        rng.shuffle(order)
+        for p in order:
+            if case[p] is not None:
+                continue
+            chosen = [q for q in range(k) if case[q] is not None]
+            scores = [0] * domains[p]
+            for others in combinations(chosen, strength - 1):
+                key = tuple(sorted(others + (p,)))
+                pool = uncovered[key]
+                if not pool:
+                    continue
+                for a in range(domains[p]):
+                    case[p] = a
+                    if tuple(case[q] for q in key) in pool:
+                        scores[a] += 1
+            best = max(scores)
+            candidates = [a for a, score in enumerate(scores) if score == best]
+            case[p] = candidates[0] if len(candidates) == 1 else rng.choice(candidates)
+
+        for key, pool in uncovered.items():
+            value = tuple(case[q] for q in key)
+            if value in pool:
+                pool.discard(value)
+                remaining -= 1
+        yield case
+
+
+def iter_combinatorial_cases(parameters, strength=2, seed=0):
+    """
+    逐个产出 n-wise 覆盖的测试用例 {参数名: 取值}
+    parameters: {参数名: 取值列表 或 边界值定义 dict}，见 parameter_values
+    strength: 覆盖强度，2 为 pairwise；参数个数不足时退化为全组合
+    seed 固定时生成结果可复现
+    """
+    names = list(parameters)
+    values = [parameter_values(parameters[name]) for name in names]
+    if strength < 1:
+        raise ValueError("strength must be at least 1")
+    if not names:
+        return
+
+    rng = random.Random(seed)
+    domains = [len(v) for v in values]
+    strength = min(strength, len(names))
+    if strength == 1:
+        # 每个取值至少出现一次即可
+        for i in range(max(domains)):
+            yield {name: v[i % len(v)] for name, v in zip(names, values)}
+        return
+
+    indexes = _iter_pairwise(domains, rng) if strength == 2 else _iter_nwise(domains, strength, rng)
+    for case in indexes:
+        yield {name: v[a] for name, v, a in zip(names, values, case)}
+
+
+# 测试用例
+def test_combinatorial_cases():
+    import time
+
+    print("=== 组合测试用例生成测试 ===")
+
+    parameters = {
+        'quantity': {'min': 1, 'max': 99, 'invalid': True},
+        'price': {'min': 0, 'max': 10000},
+        'pay_type': ['wechat', 'alipay', 'jd_pay'],
+        'member': [True, False],
+    }
+    cases = list(iter_combinatorial_cases(parameters))
+    print(f"pairwise 用例数: {len(cases)} (全组合需要 {7 * 5 * 3 * 2} 个)")
+    for case in cases[:3]:
+        print(f"  {case}")
+
+    # 校验每一对参数的每一对取值都被覆盖
+    names = list(parameters)
+    covered = all(
+        {(case[p], case[q]) for case in cases}
+        == {(a, b) for a in parameter_values(parameters[p]) for b in parameter_values(parameters[q])}
+        for p, q in combinations(names, 2))
+    print(f"所有取值对都被覆盖: {covered}")
+
+    triple = list(iter_combinatorial_cases(parameters, strength=3))
+    print(f"3-wise 用例数: {len(triple)}")
+
+    big = {f'p{i}': list(range(7)) for i in range(50)}
+    begin = time.perf_counter()
+    count = sum(1 for _ in iter_combinatorial_cases(big))
+    print(f"50 个参数 × 7 个取值: {count} 个用例，耗时 {time.perf_counter() - begin:.3f}s")
+
+
+if __name__ == "__main__":
+    test_combinatorial_cases()
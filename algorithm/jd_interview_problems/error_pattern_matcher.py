@@ -0,0 +1,240 @@
+# 京东测试开发 - 单遍多模式错误匹配
+#
+# 原来的 find_error_patterns 对每一行循环所有错误模式，逐个 re.search，
+# 注册几百个异常签名后吞吐量线性下降。
+# 这里把所有模式注册到一起编译，对每一行只从左到右扫描一遍：
+#   - 纯字面量签名构造成前缀树(trie)形式的正则，分支数不随签名数量线性增长
+#   - 定位器：所有模式的非捕获组合正则，找出第一个命中位置；大部分日志行不命中，到这里就结束
+#   - 裁决器：从第一个命中位置接着往后扫，每个正则模式放在自己的命名分组里、整体包在零宽前瞻中，
+#     每个位置上命中的分支就是该位置优先级最高的正则模式；字面量分支命中的文本映射回
+#     "它包含的所有签名中优先级最高的一个"(编译时预先算好)
+#   - 所有命中位置取优先级最高者，保持原来先注册先命中的语义
+
+import json
+import re
+
+# 默认错误模式，注册顺序即优先级
+DEFAULT_ERROR_PATTERNS = {
+    'NullPointerException': r'NullPointerException',
+    'ArrayIndexOutOfBounds': r'ArrayIndexOutOfBoundsException',
+    'FileNotFound': r'FileNotFoundException',
+    'SQLException': r'SQLException',
+    'Timeout': r'TimeoutException|timeout'
+}
+
+
+def _trie_regex(words):
+    """
+    把一组字面量构造成前缀树形式的正则，例如 ['abc', 'abd'] -> ab(?:c|d)
+    正则引擎在每个位置只需要沿着一条前缀走下去，而不是逐个尝试所有分支
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # 单词结束标记
+
+    def build(node):
+        if '' in node and len(node) == 1:
+            return ''
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if optional else body
+
+    return build(trie)
+
+
+_USER_GROUP = re.compile(r'(?<!\\)\(\?P([<=])(\w+)')
+
+
+def _isolate_groups(pattern, index):
+    """给模式里的命名分组加上前缀，多个模式拼在一起时分组名不会冲突"""
+    return _USER_GROUP.sub(lambda m: '(?P%s_e%d_%s' % (m.group(1), index, m.group(2)), pattern)
+
+
+class ErrorPatternRegistry:
+    """
+    错误模式注册表
+    register 注册模式(先注册的优先级高)，match 返回一行日志命中的错误类型
+    注意：正则模式会被拼进组合正则中，不要在模式里使用编号反向引用(命名反向引用可以)
+    """
+
+    def __init__(self, patterns=None, flags=re.IGNORECASE):
+        self._flags = flags
+        self._entries = []  # [(name, regex_source, is_literal)]
+        self._scanner = None
+        self._resolver = None
+        self._literal_matcher = None  # 只含字面量分支，正则分支命中时补查同一位置的字面量
+        self._literal_best = {}  # 命中的字面量 -> 它包含的所有字面量中最小的模式下标
+        self._min_literal = None
+        for name, pattern in (patterns or {}).items():
+            self.register(name, pattern)
+
+    def register(self, name, pattern, literal=False):
+        """注册一个错误模式，literal=True 表示按纯文本匹配"""
+        self._entries.append((name, pattern, literal))
+        self._scanner = None  # 注册表变化后重新编译
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def names(self):
+        """按注册顺序返回所有错误类型名称(去重)"""
+        return list(dict.fromkeys(name for name, _, _ in self._entries))
+
+    @property
+    def digest(self):
+        """所有模式(名称、模式、是否字面量)和匹配标志的摘要，模式内容变化时随之变化"""
+        import hashlib
+
+        payload = json.dumps([int(self._flags), self._entries], ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _key(self, text):
+        return text.lower() if self._flags & re.IGNORECASE else text
+
+    def compile(self):
+        """把所有模式编译成定位器和裁决器，只在注册表变化后执行一次"""
+        if not self._entries:
+            raise ValueError("no error pattern registered")
+
+        literal_index = {}
+        for i, (_, pattern, literal) in enumerate(self._entries):
+            if literal and pattern:
+                literal_index.setdefault(self._key(pattern), i)
+        # 前瞻在每个位置给出最长的字面量，它的子串中也可能有优先级更高的字面量
+        lengths = sorted({len(word) for word in literal_index})
+        self._literal_best = {
+            word: min(literal_index.get(word[a:a + size], index)
+                      for size in lengths if size <= len(word) for a in range(len(word) - size + 1))
+            for word, index in literal_index.items()
+        }
+        self._min_literal = min(literal_index.values(), default=None)
+
+        regexes = [(i, _isolate_groups(pattern, i))
+                   for i, (_, pattern, literal) in enumerate(self._entries) if not literal]
+        scan = ['(?:%s)' % pattern for _, pattern in regexes]
+        branches = ['(?P<_e%d>%s)' % (i, pattern) for i, pattern in regexes]
+        if literal_index:
+            trie = _trie_regex(literal_index)
+            scan.append(trie)
+            branches.append('(?P<_lit>%s)' % trie)
+            self._literal_matcher = re.compile(trie, self._flags)
+        else:
+            self._literal_matcher = None
+        # 捕获组会拖慢扫描，定位器只用非捕获组
+        self._scanner = re.compile('|'.join(scan), self._flags)
+        self._resolver = re.compile('(?=' + '|'.join(branches) + ')', self._flags)
+
+    def _literal_at(self, line, pos):
+        m = self._literal_matcher.match(line, pos)
+        return len(self._entries) if m is None else self._literal_best[self._key(m.group())]
+
+    def match(self, line):
+        """返回这一行命中的第一个(优先级最高的)错误类型，未命中返回 None"""
+        if self._scanner is None:
+            self.compile()
+
+        hit = self._scanner.search(line)
+        if hit is None:
+            return None
+
+        # 第一个命中位置之前已经扫描过，裁决器从这里接着扫
+        best = len(self._entries)
+        for m in self._resolver.finditer(line, hit.start()):
+            group = m.lastgroup
+            if group == '_lit':
+                index = self._literal_best[self._key(m.group('_lit'))]
+            else:
+                index = int(group[2:])
+                # 同一位置正则分支先命中，字面量分支没有机会尝试，优先级更高时补查一次
+                if self._min_literal is not None and self._min_literal < index:
+                    index = min(index, self._literal_at(line, m.start()))
+            if index < best:
+                best = index
+                if best == 0:
+                    break
+        return self._entries[best][0] if best < len(self._entries) else None
+
+
+_default_registry = None
+
+
+def default_error_registry():
+    """默认错误模式注册表(进程内只编译一次)"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ErrorPatternRegistry(DEFAULT_ERROR_PATTERNS)
+        _default_registry.compile()
+    return _default_registry
+
+
+# 测试用例
+def test_error_pattern_matcher():
+    import time
+
+    print("=== 单遍多模式错误匹配测试 ===")
+
+    registry = default_error_registry()
+    lines = [
+        "java.lang.NullPointerException at com.example.UserService.getUser",
+        "SQLException: Connection timeout after 30 seconds",
+        "request timeout, then NullPointerException",  # 两个都命中，按注册顺序取第一个
+        "INFO User login successful",
+    ]
+    for line in lines:
+        print(f"{line!r} -> {registry.match(line)}")
+
+    print(f"\n前缀树正则: {_trie_regex(['sqlexception', 'sqlerror', 'sql'])}")
+
+    # 注册几百个字面量签名，对比逐个 re.search 和单遍匹配的耗时
+    signatures = [f"com.example.service{i}.CustomException{i}" for i in range(300)]
+    big = ErrorPatternRegistry()
+    for sig in signatures:
+        big.register(sig, sig, literal=True)
+    big.compile()
+    sample = ["2024-01-15 14:23:45 INFO Order processed successfully"] * 300
+    sample.append("2024-01-15 14:23:46 ERROR com.example.service299.CustomException299: boom")
+
+    begin = time.perf_counter()
+    loop_hits = [next((s for s in signatures if re.search(re.escape(s), line, re.IGNORECASE)), None)
+                 for line in sample]
+    loop_seconds = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    single_hits = [big.match(line) for line in sample]
+    single_seconds = time.perf_counter() - begin
+
+    print(f"结果一致: {loop_hits == single_hits}")
+    print(f"逐个匹配: {loop_seconds:.3f}s, 单遍匹配: {single_seconds:.3f}s")
+
+    # 签名互相重叠时仍按注册顺序：后注册的长签名先被扫到，也要找回它包含的先注册的短签名
+    overlap = ErrorPatternRegistry()
+    overlap.register('Timeout', 'timeout', literal=True)
+    overlap.register('GatewayTimeout', 'gateway timeout', literal=True)
+    overlap.register('Status', r'(?P<code>5\d\d) (?P=code)')
+    overlap.register('Upstream', r'upstream(?P<code>\d+)')
+    print(f"重叠签名: {overlap.match('502 502 gateway timeout')}, 命名分组互不冲突: {overlap.match('upstream7')}")
+
+    # 错误密集的日志：每行都命中，签名数量增加时吞吐量基本不变
+    for count in (10, 100, 1000):
+        registry = ErrorPatternRegistry()
+        for i in range(count):
+            sig = f"com.example.service{i}.CustomException{i}"
+            registry.register(sig, sig, literal=True)
+        registry.compile()
+        hits = [f"ERROR {signatures[i % 10]}: boom" for i in range(20000)]
+        begin = time.perf_counter()
+        for line in hits:
+            registry.match(line)
+        print(f"{count} 个签名, 2 万行全部命中: {time.perf_counter() - begin:.3f}s")
+
+
+if __name__ == "__main__":
+    test_error_pattern_matcher()
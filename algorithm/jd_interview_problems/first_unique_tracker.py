@@ -0,0 +1,234 @@
+# 京东测试开发 - 流式"第一个只出现一次的元素"
+#
+# first_unique_char 对有限的字符串扫描两遍。线上事件流是无界的，
+# 需要随时回答"到目前为止第一个只出现过一次的用户 ID 是谁"。这里：
+#   - _unique：只出现过一次的元素，OrderedDict(哈希表 + 双向链表)按首次出现顺序排列，
+#     队首就是答案，查询 O(1)；元素第二次出现时 O(1) 从链表中摘掉
+#   - _repeated：出现过两次以上的元素，同样是 OrderedDict，按最近一次出现排列
+#   - max_items 限制两者的总元素数，超出时淘汰最久没出现的重复元素(其次是最早的唯一元素)；
+#     被淘汰的元素再出现时会被当作新元素，这是有界内存的代价
+#   - ttl 秒后过期：唯一元素在首次出现 ttl 秒后过期，重复元素在最后一次出现 ttl 秒后过期
+#     (之后再出现又算唯一)，过期在写入和查询时从链表头部惰性清理，均摊 O(1)
+# 批量写入用 Counter 在 C 层面先对整批计数，只对批内的不同元素执行一次 Python 逻辑，
+# 热点 ID 反复出现的流里，吞吐量的上限接近 Counter 本身的计数速度(每秒数百万到上千万个事件)。
+# 开启 max_items 时淘汰与批内先后顺序有关(先计数会改变谁先被淘汰)，只能按流的顺序逐个写入。
+
+import time
+from collections import Counter, OrderedDict
+
+
+class FirstUniqueTracker:
+    """
+    流式第一个唯一元素
+    max_items: 最多跟踪的元素数(唯一 + 重复)，None 表示不限
+    ttl: 过期秒数，None 表示不过期
+    clock: 时间函数，测试时可以替换
+    """
+
+    def __init__(self, max_items=None, ttl=None, clock=time.monotonic):
+        if max_items is not None and max_items < 1:
+            raise ValueError("max_items must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self._unique = OrderedDict()  # 元素 -> 首次出现时间
+        self._repeated = OrderedDict()  # 元素 -> 最近一次出现时间
+        self.evicted = 0  # 因 max_items 被淘汰的元素数
+        self.expired = 0  # 因 ttl 过期的元素数
+
+    def _now(self):
+        return self.clock() if self.ttl is not None else 0
+
+    def _expire(self, now):
+        deadline = now - self.ttl
+        for items in (self._unique, self._repeated):
+            while items:
+                key = next(iter(items))
+                if items[key] > deadline:
+                    break
+                del items[key]
+                self.expired += 1
+
+    def _evict(self):
+        while len(self._unique) + len(self._repeated) > self.max_items:
+            (self._repeated or self._unique).popitem(last=False)
+            self.evicted += 1
+
+    def _see(self, key, now, count):
+        """key 在同一时刻出现了 count 次"""
+        unique, repeated = self._unique, self._repeated
+        if key in unique:
+            del unique[key]
+            repeated[key] = now
+        elif key in repeated:
+            repeated.move_to_end(key)
+            repeated[key] = now
+        elif count == 1:
+            unique[key] = now
+        else:
+            repeated[key] = now
+
+    def add(self, key):
+        now = self._now()
+        if self.ttl is not None:
+            self._expire(now)
+        self._see(key, now, 1)
+        if self.max_items is not None:
+            self._evict()
+
+    def add_many(self, keys):
+        """批量写入，整批共用一个时间戳；结果与逐个 add 相同(过期按批次粒度)"""
+        now = self._now()
+        if self.ttl is not None:
+            self._expire(now)
+        if self.max_items is None:
+            self._add_counts(Counter(keys), now)
+            return
+        # 淘汰取决于批内的先后顺序，按流的顺序逐个写入，每次新增后立即淘汰
+        see, evict = self._see, self._evict
+        unique, repeated = self._unique, self._repeated
+        max_items = self.max_items
+        for key in keys:
+            see(key, now, 1)
+            if len(unique) + len(repeated) > max_items:
+                evict()
+
+    def _add_counts(self, counts, now):
+        """合并一块计数 {元素: 本块出现次数}，块内所有出现共用时间戳 now(只用于不限 max_items 的情况)"""
+        unique, repeated = self._unique, self._repeated
+        # 重复元素的先后顺序只在过期时用到，没开启时不需要维护
+        track_order = self.ttl is not None
+        # Counter 按首次出现顺序保存，批内新出现的唯一元素顺序不变；与 _see 的逻辑相同，内联以减少函数调用
+        for key, count in counts.items():
+            if key in unique:
+                del unique[key]
+                repeated[key] = now
+            elif key in repeated:
+                if track_order:
+                    repeated.move_to_end(key)
+                    repeated[key] = now
+            elif count == 1:
+                unique[key] = now
+            else:
+                repeated[key] = now
+
+    def first_unique(self):
+        """到目前为止第一个只出现过一次的元素，没有时返回 None"""
+        if self.ttl is not None:
+            self._expire(self.clock())
+        return next(iter(self._unique), None)
+
+    def is_unique(self, key):
+        return key in self._unique
+
+    def __len__(self):
+        return len(self._unique) + len(self._repeated)
+
+
+def benchmark_tracker(events=10_000_000, distinct=1_000_000, batch_size=100_000, seed=0):
+    """热点分布的用户 ID 流，对比逐个 add 与批量 add_many 的吞吐量"""
+    import random
+    from array import array
+
+    rng = random.Random(seed)
+    # 80% 的事件来自 1% 的热点用户，其余均匀分布
+    hot = max(1, distinct // 100)
+    stream = array('q', (rng.randrange(hot) if rng.random() < 0.8 else rng.randrange(distinct)
+                         for _ in range(events)))
+
+    rows = {}
+    tracker = FirstUniqueTracker()
+    sample = stream[:min(events, 1_000_000)]
+    begin = time.perf_counter()
+    add = tracker.add
+    for key in sample:
+        add(key)
+    rows['add'] = len(sample) / (time.perf_counter() - begin)
+
+    for name, max_items in (('add_many', None), ('add_many_bounded', distinct)):
+        tracker = FirstUniqueTracker(max_items=max_items)
+        begin = time.perf_counter()
+        for start in range(0, events, batch_size):
+            tracker.add_many(stream[start:start + batch_size])
+        rows[name] = events / (time.perf_counter() - begin)
+    print(f"逐个 add: {rows['add']:,.0f} 事件/秒; 批量 add_many(每批 {batch_size:,}): "
+          f"{rows['add_many']:,.0f} 事件/秒; 开启 max_items 时: {rows['add_many_bounded']:,.0f} 事件/秒; "
+          f"第一个唯一用户: {tracker.first_unique()}")
+    return rows
+
+
+# 测试用例
+def test_first_unique_tracker():
+    import random
+    from advanced_algorithms import first_unique_char
+
+    print("=== 流式第一个唯一元素测试 ===")
+
+    # 每个前缀的答案都与 first_unique_char 一致
+    text = "loveleetcodeloveleetcodex"
+    tracker = FirstUniqueTracker()
+    same = True
+    for i, char in enumerate(text):
+        tracker.add(char)
+        index = first_unique_char(text[:i + 1])
+        same &= tracker.first_unique() == (text[index] if index >= 0 else None)
+    print(f"每个前缀与 first_unique_char 一致: {same}, 最终答案: {tracker.first_unique()}")
+
+    # 批量写入与逐个写入结果相同，包括开启 max_items 时的淘汰
+    rng = random.Random(1)
+    for max_items in (None, 4, 20):
+        same = True
+        for _ in range(200):
+            events = [rng.randrange(10 if max_items == 4 else 50) for _ in range(rng.randrange(1, 300))]
+            one_by_one, batched = FirstUniqueTracker(max_items), FirstUniqueTracker(max_items)
+            for i in range(0, len(events), 37):
+                for key in events[i:i + 37]:
+                    one_by_one.add(key)
+                batched.add_many(events[i:i + 37])
+                same &= (one_by_one.first_unique() == batched.first_unique()
+                         and one_by_one.evicted == batched.evicted)
+        print(f"max_items={max_items}: 批量写入与逐个写入一致: {same}")
+    tracker = FirstUniqueTracker(max_items=4)
+    tracker.add_many([0, 4, 8, 7, 6, 4, 7, 5, 3, 8, 2, 4, 2, 1, 4, 8, 2, 4, 1, 1, 5, 7, 8, 1, 5, 6, 5])
+    print(f"max_items=4 的批量写入: first_unique={tracker.first_unique()}")
+
+    # TTL：用可控的时钟模拟
+    now = [0.0]
+    tracker = FirstUniqueTracker(ttl=60, clock=lambda: now[0])
+    tracker.add('user1')
+    now[0] = 30
+    tracker.add('user2')
+    tracker.add('user1')
+    print(f"t=30s 第一个唯一用户: {tracker.first_unique()}")
+    now[0] = 95
+    tracker.add('user1')
+    print(f"t=95s user2 已过期, user1 的重复记录也已过期: first_unique={tracker.first_unique()}, "
+          f"过期 {tracker.expired} 个")
+
+    # 内存上限
+    tracker = FirstUniqueTracker(max_items=1000)
+    peak = 0
+
+    def keys():
+        nonlocal peak
+        for key in range(100000):
+            peak = max(peak, len(tracker))  # 批量写入过程中的元素数
+            yield key
+
+    tracker.add_many(keys())
+    print(f"max_items=1000: 跟踪 {len(tracker)} 个(写入过程中最多 {peak} 个), 淘汰 {tracker.evicted} 个, "
+          f"第一个唯一: {tracker.first_unique()}")
+
+    print()
+    benchmark_tracker(events=2_000_000, distinct=200_000)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['bench']:
+        benchmark_tracker()
+    else:
+        test_first_unique_tracker()
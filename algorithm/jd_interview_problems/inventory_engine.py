@@ -0,0 +1,200 @@
+# 京东测试开发 - 并发库存分配引擎
+#
+# inventory_allocation 每次调用都复制整个库存 dict，单线程逐个订单检查，用字符串 SKU 查字典。
+# 这里把它改造成常驻的分配引擎：
+#   - SKU 驻留(interning)成整数下标，库存放在一个 array('q') 里，订单预先编译成 ((下标, 数量), ...)
+#   - 按批处理订单，每个订单"检查 + 预占"是原子的：要么全部商品都扣减，要么一件都不扣
+#   - 多线程并发调用安全；release() 撤销预占把库存还回去，confirm() 确认出库后不能再撤销
+#   - 记录每个订单从提交到得出结果的延迟(对数分桶直方图)
+# 加锁粒度：整个库存一把锁，每批订单只加一次锁。
+# CPython 有 GIL，按 SKU 分段加锁并不能让扣减并行，反而要处理多商品订单按序加锁的问题；
+# 订单编译、结果组装都在锁外完成，锁内只有整数比较和扣减。
+
+import threading
+import time
+from array import array
+from numbers import Integral
+
+from latency_sketch import LatencySketch
+
+FULFILLED = 'fulfilled'
+INSUFFICIENT = 'insufficient_inventory'
+DUPLICATE = 'duplicate_order'  # 同一个订单号已经预占过库存
+UNKNOWN_SKU = -1
+
+
+class InventoryEngine:
+    """
+    并发库存分配引擎
+    inventory: {sku: 库存数量}，库存和订单数量都必须是整数(库存放在 array('q') 中)
+    track_latency: 是否统计每个订单的分配延迟，见 latency_stats()
+    """
+
+    def __init__(self, inventory, track_latency=True):
+        self._index = {}  # sku -> 下标
+        self._skus = []  # 下标 -> sku
+        self._stock = array('q')
+        self._reserved = {}  # 订单号 -> 编译后的订单，release() 时按它归还库存
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.latency = LatencySketch() if track_latency else None
+        for sku, quantity in inventory.items():
+            self.restock(sku, quantity)
+
+    def restock(self, sku, quantity):
+        """补货，新 SKU 会被追加到库存数组末尾"""
+        if not isinstance(quantity, Integral) or quantity < 0:
+            raise ValueError(f"stock of {sku!r} must be a non-negative integer, got {quantity!r}")
+        with self._lock:
+            index = self._index.get(sku)
+            if index is None:
+                index = self._index[sku] = len(self._skus)
+                self._skus.append(sku)
+                self._stock.append(0)
+            self._stock[index] += quantity
+
+    def compile_order(self, items):
+        """{sku: 数量} -> ((下标, 数量), ...)，不存在的 SKU 下标为 UNKNOWN_SKU，该订单一定无法满足"""
+        index = self._index
+        lines = []
+        for sku, quantity in items.items():
+            if not isinstance(quantity, Integral) or quantity <= 0:
+                raise ValueError(f"quantity of {sku!r} must be a positive integer, got {quantity!r}")
+            lines.append((index.get(sku, UNKNOWN_SKU), quantity))
+        return tuple(lines)
+
+    def _apply(self, order_id, lines):
+        """检查并预占一个订单，调用方必须持有锁"""
+        if order_id in self._reserved:
+            return DUPLICATE
+        stock = self._stock
+        for index, quantity in lines:
+            if index == UNKNOWN_SKU or stock[index] < quantity:
+                return INSUFFICIENT
+        for index, quantity in lines:
+            stock[index] -= quantity
+        self._reserved[order_id] = lines
+        return FULFILLED
+
+    def allocate_batch(self, orders):
+        """
+        按顺序分配一批订单 {订单号: {sku: 数量}}
+        返回与 inventory_allocation 相同格式的 {订单号: {'status': ..., 'allocation': {...}}}
+        每个订单的延迟从批次提交开始算，包含等锁和排在它前面的订单的处理时间
+        """
+        begin = time.perf_counter()
+        compiled = [(order_id, self.compile_order(items)) for order_id, items in orders.items()]
+        statuses = []
+        finished = array('d') if self.latency is not None else None
+        clock = time.perf_counter
+        with self._lock:
+            for order_id, lines in compiled:
+                statuses.append(self._apply(order_id, lines))
+                if finished is not None:
+                    finished.append(clock())
+
+        if finished is not None:
+            with self._stats_lock:
+                for end in finished:
+                    self.latency.add((end - begin) * 1000)  # 毫秒
+
+        return {order_id: {'status': status, 'allocation': dict(items) if status == FULFILLED else {}}
+                for (order_id, items), status in zip(orders.items(), statuses)}
+
+    def reserve(self, order_id, items):
+        """分配单个订单，返回状态字符串"""
+        return self.allocate_batch({order_id: items})[order_id]['status']
+
+    def release(self, order_id):
+        """撤销订单的预占(取消订单/支付超时)，库存归还；订单不存在或已确认时返回 False"""
+        with self._lock:
+            lines = self._reserved.pop(order_id, None)
+            if lines is None:
+                return False
+            stock = self._stock
+            for index, quantity in lines:
+                stock[index] += quantity
+        return True
+
+    def confirm(self, order_id):
+        """确认出库，之后不能再 release；订单不存在时返回 False"""
+        with self._lock:
+            return self._reserved.pop(order_id, None) is not None
+
+    def stock(self, sku):
+        index = self._index.get(sku)
+        return 0 if index is None else self._stock[index]
+
+    def remaining(self):
+        """当前剩余库存 {sku: 数量}"""
+        with self._lock:
+            return dict(zip(self._skus, self._stock))
+
+    def reserved_orders(self):
+        with self._lock:
+            return len(self._reserved)
+
+    def latency_stats(self):
+        """订单分配延迟统计(毫秒)，字段与 performance_test_analysis 相同"""
+        if self.latency is None:
+            return {}
+        with self._stats_lock:
+            return self.latency.summary()
+
+
+# 测试用例
+def test_inventory_engine():
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("=== 并发库存分配引擎测试 ===")
+
+    engine = InventoryEngine({'item1': 100, 'item2': 50, 'item3': 200})
+    result = engine.allocate_batch({
+        'order1': {'item1': 30, 'item2': 20},
+        'order2': {'item1': 80, 'item3': 100},
+        'order3': {'item2': 40},
+        'order4': {'item9': 1},
+    })
+    print(f"分配结果: {result}")
+    print(f"剩余库存: {engine.remaining()}")
+    print(f"重复提交 order1: {engine.reserve('order1', {'item1': 1})}")
+    print(f"撤销 order1: {engine.release('order1')}, 剩余库存: {engine.remaining()}")
+
+    # 多线程压测：总库存守恒，不会超卖
+    rng = random.Random(0)
+    skus = [f'sku{i}' for i in range(1000)]
+    initial = {sku: 500 for sku in skus}
+    engine = InventoryEngine(initial)
+    threads, batches_per_thread, batch_size = 8, 25, 1000
+    workloads = [[{f't{t}-b{b}-o{o}': {sku: rng.randint(1, 3) for sku in rng.sample(skus, rng.randint(1, 3))}
+                   for o in range(batch_size)}
+                  for b in range(batches_per_thread)]
+                 for t in range(threads)]
+
+    def run(batches):
+        fulfilled = 0
+        for batch in batches:
+            results = engine.allocate_batch(batch)
+            fulfilled += sum(1 for r in results.values() if r['status'] == FULFILLED)
+        return fulfilled
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        fulfilled = sum(pool.map(run, workloads))
+    elapsed = time.perf_counter() - begin
+    total_orders = threads * batches_per_thread * batch_size
+    print(f"{threads} 线程 {total_orders} 个订单: {total_orders / elapsed:,.0f} 单/秒, 满足 {fulfilled} 单")
+
+    remaining = engine.remaining()
+    allocated = sum(quantity for batches in workloads for batch in batches
+                    for order_id, items in batch.items() if engine.confirm(order_id)
+                    for quantity in items.values())
+    print(f"库存守恒: {sum(remaining.values()) + allocated == sum(initial.values())}, "
+          f"无负库存: {min(remaining.values()) >= 0}")
+    stats = engine.latency_stats()
+    print(f"订单延迟 p50={stats['median_response_time']:.3f}ms p99={stats['p99_response_time']:.3f}ms")
+
+
+if __name__ == "__main__":
+    test_inventory_engine()
@@ -0,0 +1,296 @@
+# 京东测试开发 - SQLite 持久化库存账本
+#
+# inventory_engine 的库存只在内存里，进程重启后分配结果就丢了。
+# 这里用本地 SQLite(与 sql/test.db 相同的引擎)做持久化后端，接口与 InventoryEngine 一致：
+#   - WAL 模式：写事务不阻塞读，提交只追加 WAL 文件，比回滚日志模式少一次随机写
+#   - 预占用条件更新 UPDATE stock SET quantity = quantity - ? WHERE sku = ? AND quantity >= ?，
+#     受影响行数不足说明库存不够，不需要先 SELECT 再 UPDATE
+#   - 一批订单一个事务、一次提交(一次 fsync)；每个订单一个 SAVEPOINT，库存不足时只回滚这个订单
+#   - 订单商品用 executemany 批量执行
+# 进程在事务中途崩溃时，SQLite 保证这一批订单要么全部生效要么全部不生效，重启后账本一致。
+
+import os
+import sqlite3
+import threading
+import time
+
+FULFILLED = 'fulfilled'
+INSUFFICIENT = 'insufficient_inventory'
+DUPLICATE = 'duplicate_order'
+CONFIRMED = 'confirmed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    sku TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL CHECK (quantity >= 0)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    order_id TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (order_id, sku)
+);
+"""
+
+
+class InventoryLedger:
+    """
+    SQLite 库存账本
+    path: 数据库文件路径
+    synchronous: 'NORMAL' 在 WAL 模式下进程崩溃不丢数据，断电可能丢最后几次提交；
+                 'FULL' 每次提交都 fsync WAL，断电也不丢
+    """
+
+    def __init__(self, path, synchronous='NORMAL'):
+        if synchronous not in ('NORMAL', 'FULL'):
+            raise ValueError("synchronous must be 'NORMAL' or 'FULL'")
+        self.path = path
+        # isolation_level=None 关闭 sqlite3 模块的隐式事务，由我们显式 BEGIN/COMMIT
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'PRAGMA synchronous={synchronous}')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def restock(self, inventory):
+        """批量补货 {sku: 数量}，新 SKU 自动插入"""
+        if any(quantity < 0 for quantity in inventory.values()):
+            raise ValueError("quantity must be non-negative")
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'INSERT INTO stock (sku, quantity) VALUES (?, ?) '
+                    'ON CONFLICT (sku) DO UPDATE SET quantity = quantity + excluded.quantity',
+                    inventory.items())
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _reserve_order(self, cursor, order_id, lines, now):
+        """在当前事务中预占一个订单，返回状态"""
+        try:
+            cursor.execute('INSERT INTO orders (order_id, status, created_at) VALUES (?, ?, ?)',
+                           (order_id, FULFILLED, now))
+        except sqlite3.IntegrityError:
+            return DUPLICATE
+
+        cursor.execute('SAVEPOINT reserve_order')
+        cursor.executemany('UPDATE stock SET quantity = quantity - ? WHERE sku = ? AND quantity >= ?',
+                           [(quantity, sku, quantity) for sku, quantity in lines])
+        if cursor.rowcount != len(lines):
+            # 有商品库存不足(或 SKU 不存在)：撤销这个订单的扣减，订单记录也一起撤销
+            cursor.execute('ROLLBACK TO reserve_order')
+            cursor.execute('RELEASE reserve_order')
+            cursor.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
+            return INSUFFICIENT
+        cursor.execute('RELEASE reserve_order')
+        cursor.executemany('INSERT INTO reservations (order_id, sku, quantity) VALUES (?, ?, ?)',
+                           [(order_id, sku, quantity) for sku, quantity in lines])
+        return FULFILLED
+
+    def allocate_batch(self, orders):
+        """
+        按顺序分配一批订单 {订单号: {sku: 数量}}，整批一个事务
+        返回与 inventory_allocation 相同格式的结果
+        """
+        compiled = []
+        for order_id, items in orders.items():
+            if any(quantity <= 0 for quantity in items.values()):
+                raise ValueError(f"quantities of order {order_id!r} must be positive")
+            compiled.append((order_id, list(items.items())))
+
+        now = time.time()
+        statuses = []
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                for order_id, lines in compiled:
+                    statuses.append(self._reserve_order(cursor, order_id, lines, now))
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+        return {order_id: {'status': status, 'allocation': dict(items) if status == FULFILLED else {}}
+                for (order_id, items), status in zip(orders.items(), statuses)}
+
+    def reserve(self, order_id, items):
+        return self.allocate_batch({order_id: items})[order_id]['status']
+
+    def _finish(self, order_id, give_back):
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute('SELECT 1 FROM orders WHERE order_id = ? AND status = ?', (order_id, FULFILLED))
+                if cursor.fetchone() is None:
+                    cursor.execute('ROLLBACK')
+                    return False
+                if give_back:
+                    lines = cursor.execute('SELECT quantity, sku FROM reservations WHERE order_id = ?',
+                                           (order_id,)).fetchall()
+                    cursor.executemany('UPDATE stock SET quantity = quantity + ? WHERE sku = ?', lines)
+                    cursor.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
+                else:
+                    cursor.execute('UPDATE orders SET status = ? WHERE order_id = ?', (CONFIRMED, order_id))
+                cursor.execute('DELETE FROM reservations WHERE order_id = ?', (order_id,))
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+        return True
+
+    def release(self, order_id):
+        """撤销订单的预占，库存归还；订单不存在或已确认时返回 False"""
+        return self._finish(order_id, give_back=True)
+
+    def confirm(self, order_id):
+        """确认出库，之后不能再 release"""
+        return self._finish(order_id, give_back=False)
+
+    def stock(self, sku):
+        with self._lock:
+            row = self._conn.execute('SELECT quantity FROM stock WHERE sku = ?', (sku,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def remaining(self):
+        with self._lock:
+            return dict(self._conn.execute('SELECT sku, quantity FROM stock ORDER BY rowid'))
+
+    def reserved(self):
+        """尚未确认的预占 {sku: 数量}"""
+        with self._lock:
+            return dict(self._conn.execute('SELECT sku, SUM(quantity) FROM reservations GROUP BY sku'))
+
+    def order_status(self, order_id):
+        with self._lock:
+            row = self._conn.execute('SELECT status FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+        return None if row is None else row[0]
+
+
+def benchmark_ledger(batch_sizes=(1, 10, 100, 1000), order_count=20000, sku_count=1000,
+                     synchronous='NORMAL', seed=0):
+    """对比不同批大小下持续分配的吞吐量(单/秒)"""
+    import random
+    import shutil
+    import tempfile
+
+    rng = random.Random(seed)
+    skus = [f'sku{i}' for i in range(sku_count)]
+    orders = [{sku: rng.randint(1, 3) for sku in rng.sample(skus, rng.randint(1, 3))}
+              for _ in range(order_count)]
+    rows = []
+    workdir = tempfile.mkdtemp()
+    try:
+        for batch_size in batch_sizes:
+            path = os.path.join(workdir, f'ledger_{batch_size}.db')
+            with InventoryLedger(path, synchronous=synchronous) as ledger:
+                ledger.restock({sku: 10 ** 6 for sku in skus})
+                count = order_count if batch_size >= 100 else min(order_count, batch_size * 2000)
+                begin = time.perf_counter()
+                for start in range(0, count, batch_size):
+                    ledger.allocate_batch({f'o{i}': orders[i] for i in range(start, min(start + batch_size, count))})
+                elapsed = time.perf_counter() - begin
+            rows.append({'batch_size': batch_size, 'orders': count, 'orders_per_sec': count / elapsed})
+            print(f"batch_size={batch_size:>5}  {count / elapsed:>10,.0f} 单/秒  ({count} 单, {elapsed:.2f}s)")
+    finally:
+        shutil.rmtree(workdir)
+    return rows
+
+
+class _CrashingLedger(InventoryLedger):
+    """崩溃恢复测试用：处理到第 crash_after 个订单时直接退出进程，不提交也不回滚"""
+
+    def __init__(self, path, crash_after):
+        super().__init__(path)
+        self.crash_after = crash_after
+        self.processed = 0
+
+    def _reserve_order(self, cursor, order_id, lines, now):
+        self.processed += 1
+        if self.processed > self.crash_after:
+            os._exit(1)
+        return super()._reserve_order(cursor, order_id, lines, now)
+
+
+def _crash_worker(path, batches, crash_after):
+    ledger = _CrashingLedger(path, crash_after)
+    for batch in batches:
+        ledger.allocate_batch(batch)
+
+
+# 测试用例
+def test_inventory_ledger():
+    import multiprocessing
+    import shutil
+    import tempfile
+
+    print("=== SQLite 持久化库存账本测试 ===")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'inventory.db')
+        with InventoryLedger(path) as ledger:
+            ledger.restock({'item1': 100, 'item2': 50, 'item3': 200})
+            result = ledger.allocate_batch({
+                'order1': {'item1': 30, 'item2': 20},
+                'order2': {'item1': 80, 'item3': 100},
+                'order3': {'item2': 40},
+            })
+            print(f"分配结果: {result}")
+            print(f"重复提交 order1: {ledger.reserve('order1', {'item1': 1})}")
+
+        # 重新打开数据库，结果仍在
+        with InventoryLedger(path) as ledger:
+            print(f"重启后剩余库存: {ledger.remaining()}, order1 状态: {ledger.order_status('order1')}")
+            print(f"撤销 order1: {ledger.release('order1')}, 剩余库存: {ledger.remaining()}")
+
+        # 崩溃恢复：第 3 批处理到一半时进程被杀，前两批完整保留，第 3 批完全没有生效
+        path = os.path.join(workdir, 'crash.db')
+        initial = {f'sku{i}': 100 for i in range(10)}
+        with InventoryLedger(path) as ledger:
+            ledger.restock(initial)
+        batches = [{f'b{b}-o{o}': {f'sku{o % 10}': 1, f'sku{(o + 3) % 10}': 2} for o in range(50)}
+                   for b in range(3)]
+        process = multiprocessing.get_context('spawn').Process(target=_crash_worker, args=(path, batches, 125))
+        process.start()
+        process.join()
+        with InventoryLedger(path) as ledger:
+            remaining, reserved = ledger.remaining(), ledger.reserved()
+            committed = [ledger.order_status(f'b{b}-o0') for b in range(3)]
+        consistent = all(remaining[sku] + reserved.get(sku, 0) == initial[sku] for sku in initial)
+        print(f"子进程退出码: {process.exitcode}, 各批第一个订单状态: {committed}")
+        print(f"库存 + 预占 = 初始库存: {consistent}")
+    finally:
+        shutil.rmtree(workdir)
+
+    print("\n不同批大小的持续分配吞吐量:")
+    benchmark_ledger(batch_sizes=(1, 100, 1000), order_count=5000)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python inventory_ledger.py bench [FULL] 跑完整的批大小对比
+    if sys.argv[1:2] == ['bench']:
+        benchmark_ledger(synchronous=sys.argv[2] if len(sys.argv) > 2 else 'NORMAL')
+    else:
+        test_inventory_ledger()
@@ -0,0 +1,191 @@
+# 京东测试开发 - 多目标 k 数之和查询引擎
+#
+# 对账时要在一批金额里找出"哪几笔加起来等于差额"，two_sum、15_topic.threeSum、18_topic.fourSum
+# 每次调用都要重新排序或重新建哈希表，几百个差额就要重复几百次。
+# 这里对数组只建一次索引，然后回答任意多个目标值的查询：
+#   - 去重后的有序取值 + 每个取值的出现次数，组合按取值不重复(与 threeSum/fourSum 的去重语义相同)
+#   - k = 2 在有序取值上双指针，k = 3 固定一个数后双指针，k >= 5 逐层固定再剪枝
+#   - k = 4 用折半(meet-in-the-middle)：预先建好"两数之和 -> 取值对"的索引，
+#     每次查询只需要把两组和为 target 的取值对拼起来，O(n^4) 降到 O(n^2)
+# 结果用生成器逐个产出，组合很多时也不会一次放进一个巨大的列表。
+# 金额建议用整数(分)，浮点数相加有误差，等值比较可能失败。
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+MAX_PAIR_INDEX = 5_000_000  # 两数之和索引最多保存的取值对数量，超过时 k = 4 退化为逐层搜索
+
+
+class KSumIndex:
+    """
+    k 数之和索引
+    nums 建好索引后不再修改；positions(value) 返回某个取值在原数组中的下标，用于定位原始记录
+    """
+
+    def __init__(self, nums):
+        counter = Counter(nums)
+        self.values = sorted(counter)
+        self.counts = [counter[v] for v in self.values]
+        self._slot = {v: i for i, v in enumerate(self.values)}
+        self._positions = None
+        self._nums = nums
+        self._pair_sums = None  # 有序的两数之和
+        self._pairs_by_sum = None  # 两数之和 -> ([第一个取值下标], [(i, j)])，按 i 排序
+
+    def positions(self, value):
+        if self._positions is None:
+            self._positions = {}
+            for index, num in enumerate(self._nums):
+                self._positions.setdefault(num, []).append(index)
+        return self._positions.get(value, [])
+
+    def _available(self, i, prefix):
+        return self.counts[i] - prefix.count(i)
+
+    def _search(self, k, target, start, prefix):
+        """从下标 start 开始选 k 个取值(不减)，prefix 为已经选中的取值下标"""
+        values = self.values
+        n = len(values)
+        if k == 1:
+            i = self._slot.get(target)
+            if i is not None and i >= start and self._available(i, prefix) >= 1:
+                yield prefix + [i]
+            return
+        if k == 2:
+            lo, hi = start, n - 1
+            while lo <= hi:
+                total = values[lo] + values[hi]
+                if total < target:
+                    lo += 1
+                elif total > target:
+                    hi -= 1
+                else:
+                    if self._available(lo, prefix) >= (2 if lo == hi else 1):
+                        yield prefix + [lo, hi]
+                    lo += 1
+                    hi -= 1
+            return
+
+        largest = values[-1]
+        for i in range(start, n):
+            value = values[i]
+            if value * k > target:
+                break  # 剩下的取值都不小于 value，和只会更大
+            if value + largest * (k - 1) < target:
+                continue
+            if self._available(i, prefix) < 1:
+                continue
+            prefix.append(i)
+            yield from self._search(k - 1, target - value, i, prefix)
+            prefix.pop()
+
+    def _build_pair_index(self):
+        """两数之和 -> 取值对 (i, j)，i <= j；同一个取值出现两次以上才能和自己配对"""
+        values, counts = self.values, self.counts
+        pairs_by_sum = {}
+        for i in range(len(values)):
+            for j in range(i if counts[i] >= 2 else i + 1, len(values)):
+                pairs_by_sum.setdefault(values[i] + values[j], []).append((i, j))
+        # 按 i 递增生成，每个列表已经按第一个取值下标排好序
+        self._pairs_by_sum = {total: ([i for i, _ in pairs], pairs) for total, pairs in pairs_by_sum.items()}
+        self._pair_sums = sorted(pairs_by_sum)
+
+    def _four_sum(self, target):
+        """折半：取值 a <= b <= c <= d 唯一地拆成 (a, b) + (c, d)，且 b <= c"""
+        if self._pairs_by_sum is None:
+            self._build_pair_index()
+        counts = self.counts
+        sums, pairs_by_sum = self._pair_sums, self._pairs_by_sum
+        for total in sums[:bisect_right(sums, target / 2)]:
+            other = pairs_by_sum.get(target - total)
+            if other is None:
+                continue
+            firsts, second_pairs = other
+            for a, b in pairs_by_sum[total][1]:
+                for c, d in second_pairs[bisect_left(firsts, b):]:
+                    # (a, b)、(c, d) 各自已满足次数约束，只有 b == c 时要再检查一次
+                    if b == c and counts[b] < (2 if a < b else 3) + (1 if c == d else 0):
+                        continue
+                    yield [a, b, c, d]
+
+    def iter_k_sum(self, k, target):
+        """逐个产出和为 target 的 k 个取值组合(取值不减，组合不重复)"""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if not self.values:
+            return
+        pair_count = len(self.values) * (len(self.values) + 1) // 2
+        if k == 4 and (self._pairs_by_sum is not None or pair_count <= MAX_PAIR_INDEX):
+            combos = self._four_sum(target)
+        else:
+            combos = self._search(k, target, 0, [])
+        values = self.values
+        for combo in combos:
+            yield [values[i] for i in combo]
+
+    def iter_k_sum_many(self, k, targets):
+        """批量查询，逐个产出 (target, 组合)；k = 4 时所有查询共用一份两数之和索引"""
+        for target in targets:
+            for combo in self.iter_k_sum(k, target):
+                yield target, combo
+
+    def two_sum(self, target):
+        """
+        返回格式与 two_sum 相同：一对原数组下标 [i, j](i < j)，不存在时返回 []
+        有多组解时按取值从小到大选第一组，不一定与 two_sum 选中的是同一组
+        """
+        for a, b in self.iter_k_sum(2, target):
+            if a == b:
+                first, second = self.positions(a)[:2]
+            else:
+                first, second = sorted((self.positions(a)[0], self.positions(b)[0]))
+            return [first, second]
+        return []
+
+
+# 测试用例
+def test_ksum_engine():
+    import importlib.util
+    import os
+    import random
+    import time
+
+    print("=== 多目标 k 数之和查询引擎测试 ===")
+
+    def load_solution(filename):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', filename)
+        spec = importlib.util.spec_from_file_location(filename[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.Solution()
+
+    index = KSumIndex([1, 0, -1, 0, -2, 2])
+    print(f"fourSum(0): {list(index.iter_k_sum(4, 0))}")
+    print(f"threeSum(0): {list(index.iter_k_sum(3, 0))}")
+    print(f"two_sum(1) 下标: {index.two_sum(1)}")
+    print(f"[2,2,2,2,2] fourSum(8): {list(KSumIndex([2] * 5).iter_k_sum(4, 8))}")
+
+    # 与原始解法逐个目标对比
+    rng = random.Random(0)
+    nums = [rng.randint(-50, 50) for _ in range(150)]
+    index = KSumIndex(nums)
+    three, four = load_solution('15_topic.py'), load_solution('18_topic.py')
+    targets = list(range(-20, 21))
+    same = all(sorted(map(tuple, index.iter_k_sum(4, t))) == sorted(map(tuple, four.fourSum(list(nums), t)))
+               for t in targets)
+    print(f"k=4 与 18_topic.fourSum 一致: {same}")
+    print(f"k=3 与 15_topic.threeSum 一致: "
+          f"{sorted(map(tuple, index.iter_k_sum(3, 0))) == sorted(map(tuple, three.threeSum(list(nums))))}")
+
+    begin = time.perf_counter()
+    for t in targets:
+        four.fourSum(list(nums), t)
+    baseline = time.perf_counter() - begin
+    begin = time.perf_counter()
+    found = sum(1 for _ in index.iter_k_sum_many(4, targets))
+    print(f"{len(targets)} 个目标 fourSum: 原始解法 {baseline:.3f}s, 索引 {time.perf_counter() - begin:.3f}s, "
+          f"共 {found} 个组合")
+
+
+if __name__ == "__main__":
+    test_ksum_engine()
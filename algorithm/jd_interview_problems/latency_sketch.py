@@ -0,0 +1,150 @@
+# 京东测试开发 - 流式分位数估计(对数分桶直方图)
+#
+# performance_test_analysis 需要把所有响应时间放在内存里，压测几十亿个样本时放不下，
+# 而且每算一个分位数 statistics.quantiles 都要重新排序一遍。
+# 这里用对数分桶直方图(DDSketch 的思路)：
+#   桶 i 覆盖 (gamma^(i-1), gamma^i]，gamma = (1 + a) / (1 - a)，a 为相对误差
+#   用桶的"几何中点" 2 * gamma^i / (gamma + 1) 作为估计值，任何分位数的相对误差都不超过 a
+# 桶的数量只和数值范围有关：a = 1% 时 1 微秒到 1000 秒之间只需要约 1400 个桶，内存恒定。
+# 两个直方图的桶一一对应，不同压测机的结果把计数相加即可合并，合并后误差界不变。
+
+import math
+
+
+class LatencySketch:
+    """
+    可合并的流式分位数估计器
+    relative_accuracy: 分位数估计的相对误差上界，默认 1%
+    min/max/count/sum 是精确值，只有分位数是估计值
+    q 分位数定义为排序后第 floor(q * (count - 1)) 个样本，估计值与它的相对误差不超过 relative_accuracy
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}  # 桶编号 -> 样本数
+        self._zero_count = 0  # 值为 0 的样本单独计数(log 0 无定义)
+        self.count = 0
+        self.total = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, count=1):
+        """加入一个样本，count 为该值重复的次数"""
+        if value < 0:
+            raise ValueError("latency must be non-negative")
+        if value == 0:
+            self._zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """批量加入样本，values 可以是任意可迭代对象"""
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """合并另一台压测机的直方图，两者的相对误差必须相同"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for key, count in other._buckets.items():
+            self._buckets[key] = self._buckets.get(key, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """估计 q 分位数(0 <= q <= 1)，没有样本时返回 None"""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        """一次估计多个分位数，只遍历一遍桶"""
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("q must be in [0, 1]")
+        order = sorted(range(len(qs)), key=lambda i: qs[i])
+        result = [None] * len(qs)
+        if self.count == 0:
+            return result
+
+        keys = sorted(self._buckets)
+        seen = self._zero_count
+        pos = 0
+        for i in order:
+            rank = qs[i] * (self.count - 1)
+            if rank < self._zero_count:
+                result[i] = 0
+                continue
+            while pos < len(keys) and seen + self._buckets[keys[pos]] <= rank:
+                seen += self._buckets[keys[pos]]
+                pos += 1
+            if pos == len(keys):
+                result[i] = self.max
+            else:
+                estimate = 2 * self._gamma ** keys[pos] / (self._gamma + 1)
+                result[i] = min(max(estimate, self.min), self.max)
+        return result
+
+    def summary(self):
+        """输出与 performance_test_analysis 相同字段的性能指标，另外提供 p50 和 p99.9"""
+        if self.count == 0:
+            return {}
+
+        p50, p90, p95, p99, p999 = self.quantiles([0.5, 0.9, 0.95, 0.99, 0.999])
+        analysis = {
+            'total_requests': self.count,
+            'min_response_time': self.min,
+            'max_response_time': self.max,
+            'avg_response_time': self.total / self.count,
+            'median_response_time': p50,
+            'p90_response_time': p90,
+            'p95_response_time': p95,
+            'p99_response_time': p99,
+            'p999_response_time': p999,
+        }
+        total_time = self.total / 1000  # 转换为秒
+        if total_time > 0:
+            analysis['tps'] = self.count / total_time
+        return analysis
+
+
+# 测试用例
+def test_latency_sketch():
+    import random
+
+    print("=== 流式分位数估计测试 ===")
+
+    random.seed(42)
+    # 模拟两台压测机，响应时间服从对数正态分布(毫秒)
+    machine_a = [random.lognormvariate(5, 0.6) for _ in range(50000)]
+    machine_b = [random.lognormvariate(5.2, 0.8) for _ in range(50000)]
+
+    sketch = LatencySketch(0.01).add_many(machine_a)
+    sketch.merge(LatencySketch(0.01).add_many(machine_b))
+
+    exact = sorted(machine_a + machine_b)
+    print(f"桶数量: {len(sketch._buckets)}, 样本数: {sketch.count}")
+    for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+        truth = exact[int(q * (len(exact) - 1))]
+        estimate = sketch.quantile(q)
+        print(f"p{q * 100:g}: 精确值={truth:.2f}, 估计值={estimate:.2f}, "
+              f"相对误差={abs(estimate - truth) / truth:.4%}")
+
+    print(f"\n汇总: {sketch.summary()}")
+
+
+if __name__ == "__main__":
+    test_latency_sketch()
@@ -0,0 +1,157 @@
+# 京东测试开发 - 线性递推快速求值(Kitamasa 算法)
+#
+# climb_stairs 用 O(n) 的 dp 数组，70_topic.climbStairs 用 functools.cache 递归，
+# n 稍大就会栈溢出或者占用 O(n) 内存，n = 10^18 更是不可能算完。
+# 爬楼梯是常系数线性递推 a(n) = c1*a(n-1) + c2*a(n-2) + ... + ck*a(n-k)：
+#   - 任意步长集合 steps = {1, 2} / {1, 3, 5}：ways(n) = sum(ways(n - s))，即步长 s 处系数为 1
+#   - 求 a(n) 等价于求 x^n 对特征多项式 P(x) = x^k - c1*x^(k-1) - ... - ck 取余，
+#     余式 r(x) = sum(r_i * x^i) 给出 a(n) = sum(r_i * a(i))
+#   - 多项式快速幂，每次乘法 O(k^2)，总共 O(k^2 log n)；比 k×k 矩阵快速幂的 O(k^3 log n) 少一个 k
+# 批量查询时 x^(2^j) mod P 只算一次，所有 n 共用。
+# 不取模时结果是精确大整数，位数与 n 成正比；n 很大时请传 modulus(比如 10^9 + 7)。
+
+MOD = 10 ** 9 + 7
+
+
+class LinearRecurrence:
+    """
+    常系数线性递推 a(n) = coefficients[0]*a(n-1) + ... + coefficients[k-1]*a(n-k)
+    initial: a(0) ... a(k-1)
+    modulus: 结果取模，None 表示精确计算
+    """
+
+    def __init__(self, coefficients, initial, modulus=None):
+        if not coefficients:
+            raise ValueError("coefficients must not be empty")
+        if len(initial) != len(coefficients):
+            raise ValueError("need exactly one initial value per coefficient")
+        if modulus is not None and modulus < 1:
+            raise ValueError("modulus must be positive")
+        self.k = len(coefficients)
+        self.modulus = modulus
+        self.coefficients = [self._mod(c) for c in coefficients]
+        self.initial = [self._mod(a) for a in initial]
+        self._pow2 = []  # x^(2^j) mod P
+
+    @classmethod
+    def from_steps(cls, steps, modulus=None):
+        """每次可以走 steps 中任意一个台阶数，a(n) 为走到第 n 阶的方法数，a(0) = 1"""
+        steps = sorted(set(steps))
+        if not steps or steps[0] < 1:
+            raise ValueError("steps must be positive integers")
+        k = steps[-1]
+        coefficients = [1 if i in steps else 0 for i in range(1, k + 1)]
+        initial = [1]
+        for n in range(1, k):
+            initial.append(sum(initial[n - s] for s in steps if s <= n))
+        return cls(coefficients, initial, modulus)
+
+    def _mod(self, value):
+        return value % self.modulus if self.modulus is not None else value
+
+    def _reduce(self, poly):
+        """对特征多项式取余：x^d = sum(c_i * x^(d-i))，从最高次往下消"""
+        k, coefficients, modulus = self.k, self.coefficients, self.modulus
+        for d in range(len(poly) - 1, k - 1, -1):
+            top = poly[d]
+            if top:
+                if modulus is not None:
+                    top %= modulus
+                for i, c in enumerate(coefficients, 1):
+                    if c:
+                        poly[d - i] += top * c
+        poly = poly[:k] + [0] * (k - len(poly))
+        return [v % modulus for v in poly] if modulus is not None else poly
+
+    def _multiply(self, a, b):
+        product = [0] * (2 * self.k - 1)
+        for i, x in enumerate(a):
+            if x:
+                for j, y in enumerate(b):
+                    if y:
+                        product[i + j] += x * y
+        return self._reduce(product)
+
+    def _power_of_two(self, j):
+        while len(self._pow2) <= j:
+            if not self._pow2:
+                self._pow2.append(self._reduce([0, 1]))  # x mod P
+            else:
+                last = self._pow2[-1]
+                self._pow2.append(self._multiply(last, last))
+        return self._pow2[j]
+
+    def term(self, n):
+        """a(n)"""
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        if n < self.k:
+            return self.initial[n]
+        remainder = None
+        j = 0
+        while n:
+            if n & 1:
+                power = self._power_of_two(j)
+                remainder = power if remainder is None else self._multiply(remainder, power)
+            n >>= 1
+            j += 1
+        return self._mod(sum(r * a for r, a in zip(remainder, self.initial)))
+
+    def terms(self, ns):
+        """批量求 a(n)，返回与 ns 一一对应的列表，x^(2^j) 在所有查询间共用"""
+        ns = list(ns)
+        if ns and max(ns) >= self.k:
+            self._power_of_two(max(ns).bit_length() - 1)  # 一次性算好需要的所有幂
+        return [self.term(n) for n in ns]
+
+
+def climb_stairs_ways(n, steps=(1, 2), modulus=None):
+    """每次爬 steps 中任意台阶数，爬到第 n 阶的方法数"""
+    return LinearRecurrence.from_steps(steps, modulus).term(n)
+
+
+# 测试用例
+def test_linear_recurrence():
+    import importlib.util
+    import os
+    import random
+    import time
+    from advanced_algorithms import climb_stairs
+
+    print("=== 线性递推快速求值测试 ===")
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '70_topic.py')
+    spec = importlib.util.spec_from_file_location('topic_70', path)
+    topic = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(topic)
+
+    fibonacci = LinearRecurrence.from_steps((1, 2))
+    same = all(fibonacci.term(n) == topic.Solution().climbStairs(n) for n in range(1, 46))
+    print(f"与 70_topic.climbStairs 一致(n=1..45): {same}")
+    print(f"与 climb_stairs 一致(n=1..45): {all(fibonacci.term(n) == climb_stairs(n) for n in range(1, 46))}")
+
+    # 步长 {1, 3, 5} 与暴力 dp 对比
+    steps = (1, 3, 5)
+    dp = [1] + [0] * 60
+    for n in range(1, 61):
+        dp[n] = sum(dp[n - s] for s in steps if s <= n)
+    print(f"步长 {steps} 与 dp 一致: {LinearRecurrence.from_steps(steps).terms(range(61)) == dp}")
+
+    # 一般系数：Tribonacci
+    tribonacci = LinearRecurrence([1, 1, 1], [0, 0, 1])
+    print(f"Tribonacci 前 10 项: {tribonacci.terms(range(10))}")
+
+    begin = time.perf_counter()
+    value = climb_stairs_ways(10 ** 18, modulus=MOD)
+    print(f"n=10^18 爬楼梯方法数 mod 1e9+7 = {value}, 耗时 {(time.perf_counter() - begin) * 1000:.2f}ms")
+
+    rng = random.Random(0)
+    ns = [rng.randrange(10 ** 18) for _ in range(1000)]
+    engine = LinearRecurrence.from_steps((1, 2, 3, 5, 8), modulus=MOD)
+    begin = time.perf_counter()
+    engine.terms(ns)
+    print(f"步长 (1,2,3,5,8) 批量查询 1000 个 n < 10^18: {time.perf_counter() - begin:.3f}s")
+
+
+if __name__ == "__main__":
+    test_linear_recurrence()
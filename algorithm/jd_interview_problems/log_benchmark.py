@@ -0,0 +1,183 @@
+# 京东测试开发 - 日志分析函数基准测试
+#
+# 对 test_scenario_algorithms 中的分析函数及其工程化扩展跑基准，记录：
+#   - 耗时、吞吐量(行/秒、MB/秒)；performance_test_analysis 的输入是响应时间样本而不是日志，
+#     用 log_generator.generate_latencies 按同一个种子生成与日志行数相同的样本，记录样本/秒
+#   - 峰值内存(RSS)：每个分析函数在独立的 spawn 子进程中运行，互不影响
+# 结果追加写入 JSON 文件，每次运行一条记录，方便对比不同版本的性能变化。
+#
+# 用法：
+#   python log_benchmark.py                       生成 1MB 合成日志跑一遍(演示)
+#   python log_benchmark.py 1GB results.json      生成 1GB 合成日志，结果写入 results.json
+#   python log_benchmark.py /data/access.log      对已有日志文件跑基准
+
+import json
+import os
+import time
+
+DEFAULT_RESULTS_PATH = 'benchmark_results.json'
+
+
+def _run_analyzer(name, path):
+    """按名称执行一个分析函数，在子进程中调用"""
+    from log_reader import iter_log_lines
+
+    if name == 'analyze_log_times':
+        from test_scenario_algorithms import analyze_log_times
+        analyze_log_times(iter_log_lines(path))
+    elif name == 'find_error_patterns':
+        from test_scenario_algorithms import find_error_patterns
+        find_error_patterns(iter_log_lines(path))
+    elif name == 'analyze_log_times_parallel':
+        from log_parallel import analyze_log_times_parallel
+        analyze_log_times_parallel(path)
+    elif name == 'analyze_log_buckets':
+        from log_time_buckets import analyze_log_buckets
+        analyze_log_buckets(iter_log_lines(path), 'minute', by_level=True)
+    elif name == 'cluster_stack_traces':
+        from stack_trace_clustering import cluster_stack_traces
+        cluster_stack_traces(iter_log_lines(path))
+    elif name == 'latency_sketch':
+        from latency_sketch import LatencySketch
+        from log_column_cache import LATENCY_PATTERN
+        sketch = LatencySketch()
+        for line in iter_log_lines(path):
+            match = LATENCY_PATTERN.search(line)
+            if match:
+                sketch.add(float(match.group(1)))
+        sketch.summary()
+    else:
+        raise ValueError(f"unknown analyzer: {name}")
+
+
+ANALYZERS = [
+    'analyze_log_times',
+    'find_error_patterns',
+    'analyze_log_times_parallel',
+    'analyze_log_buckets',
+    'cluster_stack_traces',
+    'latency_sketch',
+    'performance_test_analysis',
+]
+SAMPLE_ANALYZERS = {'performance_test_analysis'}  # 输入为响应时间样本的分析函数
+
+
+def _measure(name, path, samples=0, seed=0):
+    """子进程入口：返回 (耗时秒数, 峰值 RSS 字节数)；样本在计时开始前生成，峰值内存包含样本本身"""
+    import resource
+    import sys
+
+    if name in SAMPLE_ANALYZERS:
+        from log_generator import generate_latencies
+        from test_scenario_algorithms import performance_test_analysis
+
+        latencies = generate_latencies(samples, seed=seed)
+        begin = time.perf_counter()
+        performance_test_analysis(latencies)
+    else:
+        begin = time.perf_counter()
+        _run_analyzer(name, path)
+    seconds = time.perf_counter() - begin
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return seconds, peak if sys.platform == 'darwin' else peak * 1024
+
+
+def count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+
+
+def run_benchmarks(path, analyzers=None, results_path=DEFAULT_RESULTS_PATH, samples=None, seed=0):
+    """
+    对日志文件跑所有分析函数，把本次结果追加到 results_path 并返回
+    samples 为响应时间样本数，默认与日志行数相同；seed 为生成样本的随机种子
+    """
+    import multiprocessing
+    import platform
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = os.path.getsize(path)
+    lines = count_lines(path)
+    samples = lines if samples is None else samples
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in analyzers or ANALYZERS:
+        # 每个分析函数一个全新的进程，峰值内存只包含它自己
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            seconds, peak_rss = pool.submit(_measure, name, path, samples, seed).result()
+        row = {'analyzer': name, 'seconds': round(seconds, 4)}
+        if name in SAMPLE_ANALYZERS:
+            row['samples'] = samples
+            row['samples_per_sec'] = round(samples / seconds)
+            throughput = f"{row['samples_per_sec']:>12,} samples/s {'':>13}"
+        else:
+            row['lines_per_sec'] = round(lines / seconds)
+            row['mb_per_sec'] = round(size / (1 << 20) / seconds, 2)
+            throughput = f"{row['lines_per_sec']:>12,} lines/s {row['mb_per_sec']:>8.2f} MB/s"
+        row['peak_rss_mb'] = round(peak_rss / (1 << 20), 1)
+        results.append(row)
+        print(f"{name:<28} {row['seconds']:>9.3f}s {throughput}  peak RSS {row['peak_rss_mb']:>7.1f} MB")
+
+    run = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'file': os.path.abspath(path),
+        'size_bytes': size,
+        'lines': lines,
+        'seed': seed,
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    history = {'runs': []}
+    if os.path.exists(results_path):
+        with open(results_path, encoding='utf-8') as f:
+            history = json.load(f)
+    history['runs'].append(run)
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    return run
+
+
+def benchmark_synthetic(size='10MB', results_path=DEFAULT_RESULTS_PATH, seed=0, **options):
+    """生成指定大小的合成日志并跑基准，结束后删除临时日志"""
+    import tempfile
+    from log_generator import generate_log_file
+
+    fd, path = tempfile.mkstemp(suffix='.log')
+    os.close(fd)
+    try:
+        generate_log_file(path, size, seed=seed, **options)
+        return run_benchmarks(path, results_path=results_path, seed=seed)
+    finally:
+        os.remove(path)
+
+
+# 测试用例
+def test_log_benchmark():
+    import tempfile
+
+    print("=== 日志分析基准测试 ===")
+
+    fd, results_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    os.remove(results_path)
+    try:
+        run = benchmark_synthetic('1MB', results_path=results_path)
+        with open(results_path, encoding='utf-8') as f:
+            print(f"结果文件记录数: {len(json.load(f)['runs'])}, 本次分析函数数: {len(run['results'])}")
+    finally:
+        if os.path.exists(results_path):
+            os.remove(results_path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    if not args:
+        test_log_benchmark()
+    elif os.path.exists(args[0]):
+        run_benchmarks(args[0], results_path=args[1] if len(args) > 1 else DEFAULT_RESULTS_PATH)
+    else:
+        benchmark_synthetic(args[0], results_path=args[1] if len(args) > 1 else DEFAULT_RESULTS_PATH)
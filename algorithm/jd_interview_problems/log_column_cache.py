@@ -0,0 +1,275 @@
+# 京东测试开发 - 日志解析结果列式缓存
+#
+# 分析同学会对同一批历史日志反复执行 analyze_log_times、find_error_patterns 和响应时间分析，
+# 每次都要重新解析文本，时间全花在正则和字符串处理上。
+# 这里第一次分析时把日志解析成四列定长数组，写成 NumPy 的 .npy 文件：
+#   epoch(int64 时间戳秒)、level(int8 日志级别编码)、error(int16 错误类型编码)、latency(float64 响应时间毫秒)
+# 之后的分析直接内存映射这些列，不再解析文本。
+# 缓存按 (文件大小, 修改时间, 内容摘要) 判断是否有效：大小和修改时间都没变直接使用；
+# 只有修改时间变了(比如被 touch 过)再计算内容摘要确认。错误类型列依赖注册的模式，
+# 同时比较注册表摘要(名称、模式、是否字面量、匹配标志)，同名模式改了内容也会重建。
+# .npy 文件由标准库按 NumPy 格式写出，安装了 numpy 时用 np.load(mmap_mode='r') 读取并向量化统计，
+# 没有 numpy 时用 mmap + memoryview 读取，同样不需要把数据复制进内存。
+
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖
+    np = None
+
+from error_pattern_matcher import ErrorPatternRegistry, default_error_registry
+from log_reader import iter_log_lines
+from log_time_buckets import LOG_LEVELS, parse_log_line
+
+# 列名 -> (array 类型码, NumPy dtype 描述)
+COLUMNS = {
+    'epoch': ('q', '<i8'),
+    'level': ('b', '|i1'),
+    'error': ('h', '<i2'),
+    'latency': ('d', '<f8'),
+}
+NPY_HEADER_SIZE = 128  # 固定长度的文件头，写完数据后再回填行数
+NO_TIMESTAMP = -(1 << 63)  # 没有时间戳的行
+NO_ERROR = -1
+LATENCY_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*ms\b')
+FLUSH_ROWS = 1 << 20  # 每解析这么多行写一次磁盘，构建缓存时内存占用有上界
+
+
+def _npy_header(descr, length):
+    """生成固定长度的 .npy v1.0 文件头"""
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+    padding = NPY_HEADER_SIZE - 10 - len(header) - 1
+    if padding < 0:
+        raise ValueError("column too long for the fixed npy header")
+    header = header + ' ' * padding + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+
+def load_column(path, typecode):
+    """内存映射一列，返回 numpy.memmap 或 memoryview"""
+    if np is not None:
+        return np.load(path, mmap_mode='r')
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped)[NPY_HEADER_SIZE:].cast(typecode)
+
+
+def _file_digest(path):
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LogColumnCache:
+    """
+    日志列式缓存
+    cache_dir 默认在日志同目录下的 <日志文件名>.columns/ 中
+    registry 为错误模式注册表，默认使用 find_error_patterns 的内置模式
+    """
+
+    def __init__(self, log_path, cache_dir=None, registry=None):
+        self.log_path = log_path
+        self.cache_dir = cache_dir or log_path + '.columns'
+        self.registry = registry or default_error_registry()
+        self._columns = None
+        self._meta = None
+
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, 'meta.json')
+
+    def _column_path(self, name):
+        return os.path.join(self.cache_dir, name + '.npy')
+
+    def is_valid(self):
+        """缓存是否与当前日志文件对应"""
+        if not os.path.exists(self._meta_path()):
+            return False
+        with open(self._meta_path(), encoding='utf-8') as f:
+            meta = json.load(f)
+        stat = os.stat(self.log_path)
+        if meta['size'] != stat.st_size or meta.get('registry_digest') != self.registry.digest:
+            return False
+        if meta['mtime_ns'] != stat.st_mtime_ns:
+            # 修改时间变了但内容可能没变，用内容摘要确认
+            if meta['digest'] != _file_digest(self.log_path):
+                return False
+            meta['mtime_ns'] = stat.st_mtime_ns
+            self._write_meta(meta)
+        self._meta = meta
+        return True
+
+    def _write_meta(self, meta):
+        tmp_path = self._meta_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path())
+
+    def build(self):
+        """解析整个日志文件，分批写出四列数组"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.exists(self._meta_path()):
+            os.remove(self._meta_path())  # 先让旧缓存失效，构建到一半失败时不会被误用
+
+        stat = os.stat(self.log_path)
+        error_codes = {name: code for code, name in enumerate(self.registry.names)}
+        files = {name: open(self._column_path(name), 'wb') for name in COLUMNS}
+        buffers = {name: array(typecode) for name, (typecode, _) in COLUMNS.items()}
+        rows = 0
+        try:
+            for f in files.values():
+                f.write(b'\0' * NPY_HEADER_SIZE)  # 占位，最后回填
+
+            for line in iter_log_lines(self.log_path):
+                parsed = parse_log_line(line)
+                epoch, level = parsed if parsed is not None else (NO_TIMESTAMP, LOG_LEVELS.index('OTHER'))
+                error_type = self.registry.match(line)
+                latency = LATENCY_PATTERN.search(line)
+
+                buffers['epoch'].append(epoch)
+                buffers['level'].append(level)
+                buffers['error'].append(NO_ERROR if error_type is None else error_codes[error_type])
+                buffers['latency'].append(float(latency.group(1)) if latency else float('nan'))
+                rows += 1
+                if rows % FLUSH_ROWS == 0:
+                    self._flush(files, buffers)
+            self._flush(files, buffers)
+
+            for name, f in files.items():
+                f.seek(0)
+                f.write(_npy_header(COLUMNS[name][1], rows))
+        finally:
+            for f in files.values():
+                f.close()
+
+        self._write_meta({
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': _file_digest(self.log_path),
+            'rows': rows,
+            'error_types': self.registry.names,
+            'registry_digest': self.registry.digest,
+        })
+        self._columns = None
+
+    @staticmethod
+    def _flush(files, buffers):
+        for name, buffer in buffers.items():
+            if sys.byteorder == 'big':
+                buffer.byteswap()  # .npy 中统一按小端存储
+            files[name].write(buffer.tobytes())
+            del buffer[:]
+
+    def columns(self):
+        """返回 {列名: 内存映射的列}，缓存无效时先重新构建"""
+        if self._columns is None:
+            if not self.is_valid():
+                self.build()
+            self._columns = {name: load_column(self._column_path(name), typecode)
+                             for name, (typecode, _) in COLUMNS.items()}
+        return self._columns
+
+    def hourly_counts(self):
+        """与 analyze_log_times 结果相同的每小时日志数量"""
+        import time
+
+        epochs = self.columns()['epoch']
+        if np is not None:
+            hours, counts = np.unique(epochs[epochs != NO_TIMESTAMP] // 3600, return_counts=True)
+            pairs = zip(hours.tolist(), counts.tolist())
+        else:
+            totals = {}
+            for epoch in epochs:
+                if epoch != NO_TIMESTAMP:
+                    hour = epoch // 3600
+                    totals[hour] = totals.get(hour, 0) + 1
+            pairs = totals.items()
+        return {time.strftime('%Y-%m-%d %H', time.gmtime(hour * 3600)): count for hour, count in pairs}
+
+    def error_counts(self):
+        """与 find_error_patterns 结果相同的错误类型频次"""
+        codes = self.columns()['error']
+        names = self.registry.names
+        if np is not None:
+            counts = np.bincount(codes[codes != NO_ERROR], minlength=len(names)).tolist()
+        else:
+            counts = [0] * len(names)
+            for code in codes:
+                if code != NO_ERROR:
+                    counts[code] += 1
+        return {names[code]: count for code, count in enumerate(counts) if count}
+
+    def latency_analysis(self):
+        """对日志中解析出的响应时间做 performance_test_analysis"""
+        from test_scenario_algorithms import performance_test_analysis
+
+        latencies = self.columns()['latency']
+        if np is not None:
+            return performance_test_analysis(latencies[~np.isnan(latencies)])
+        return performance_test_analysis(array('d', (v for v in latencies if v == v)))
+
+
+# 测试用例
+def test_log_column_cache():
+    import shutil
+    import tempfile
+    import time
+    from test_scenario_algorithms import analyze_log_times, find_error_patterns
+
+    print("=== 日志列式缓存测试 ===")
+
+    lines = [
+        "2024-01-15 14:23:45 INFO GET /api/user 200 35ms",
+        "2024-01-15 14:24:12 ERROR SQLException: Database connection failed 1200ms",
+        "2024-01-15 15:10:22 ERROR TimeoutException: Request timeout after 5000ms",
+        "2024-01-15 15:11:45 INFO GET /api/order 200 80ms",
+        "stack trace line without timestamp",
+    ] * 2000
+    workdir = tempfile.mkdtemp()
+    log_path = os.path.join(workdir, 'app.log')
+    try:
+        with open(log_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        cache = LogColumnCache(log_path)
+        begin = time.perf_counter()
+        hourly = cache.hourly_counts()
+        print(f"首次分析(解析并构建缓存): {time.perf_counter() - begin:.3f}s")
+
+        cache = LogColumnCache(log_path)
+        begin = time.perf_counter()
+        cache.hourly_counts()
+        errors = cache.error_counts()
+        print(f"再次分析(直接读取缓存): {time.perf_counter() - begin:.3f}s")
+
+        print(f"每小时统计一致: {hourly == analyze_log_times(lines)}")
+        print(f"错误统计一致: {errors == find_error_patterns(lines)}")
+        print(f"响应时间 p99: {cache.latency_analysis()['p99_response_time']}")
+
+        # 只 touch 不改内容，缓存仍然有效
+        os.utime(log_path)
+        print(f"touch 后缓存仍有效: {LogColumnCache(log_path).is_valid()}")
+
+        # 同名错误类型换了模式，缓存的错误列不能再用
+        registry = ErrorPatternRegistry()
+        registry.register('DB', 'SQLException')
+        LogColumnCache(log_path, registry=registry).columns()
+        registry = ErrorPatternRegistry()
+        registry.register('DB', 'Database')
+        cache = LogColumnCache(log_path, registry=registry)
+        print(f"模式改变后缓存失效: {not cache.is_valid()}, 错误统计: {cache.error_counts()}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    test_log_column_cache()
@@ -0,0 +1,145 @@
+# 京东测试开发 - 合成日志与响应时间生成器
+#
+# test_scenario_algorithms() 只用 5 行日志演示，无法衡量各个分析函数在大数据量下的表现。
+# 这里按固定随机种子生成指定大小(1MB ~ 10GB)的日志文件，结果可复现：
+#   - 错误比例和错误类型分布可配置，错误行后面可以带多行 Java 堆栈
+#   - 时间戳按固定速率递增，可加入随机乱序(timestamp skew)模拟多线程写日志
+#   - 每行带 "NNms" 形式的响应时间，服从对数正态分布
+# 数据按批写入，生成 10GB 文件时内存占用也只有一个批次的大小。
+
+import random
+from array import array
+
+# 默认错误类型及其权重，文本与 find_error_patterns 的内置模式对应
+DEFAULT_ERROR_MIX = {
+    'java.lang.NullPointerException: user not found': 30,
+    'java.sql.SQLException: Connection refused': 25,
+    'java.util.concurrent.TimeoutException: Request timeout': 25,
+    'java.io.FileNotFoundException: config.properties': 10,
+    'java.lang.ArrayIndexOutOfBoundsException: Index 10 out of bounds for length 5': 10,
+}
+INFO_MESSAGES = [
+    'GET /api/user/detail 200',
+    'POST /api/order/submit 200',
+    'GET /api/product/list 200',
+    'User login successful',
+    'Order processed successfully',
+]
+SIZE_UNITS = {'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+
+def parse_size(size):
+    """'10GB' / '512MB' / 1048576 -> 字节数"""
+    if isinstance(size, int):
+        return size
+    text = size.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def generate_latencies(count, seed=0, median_ms=80, sigma=0.8):
+    """生成 count 个服从对数正态分布的响应时间(毫秒)，返回 array('d')"""
+    import math
+
+    rng = random.Random(seed)
+    mu = math.log(median_ms)
+    return array('d', (rng.lognormvariate(mu, sigma) for _ in range(count)))
+
+
+def iter_log_records(seed=0, start_epoch=1705276800, lines_per_second=200, error_rate=0.05,
+                     error_mix=None, skew_seconds=0, stack_depth=3):
+    """
+    无限产出日志记录(每条可能包含多行)
+    start_epoch 默认为 2024-01-15 00:00:00；skew_seconds 为时间戳随机向前偏移的最大秒数
+    """
+    import math
+    import time
+
+    rng = random.Random(seed)
+    error_mix = error_mix or DEFAULT_ERROR_MIX
+    errors = list(error_mix)
+    weights = list(error_mix.values())
+    mu = math.log(80)
+    stamp_cache = {}
+    index = 0
+    while True:
+        epoch = start_epoch + index // lines_per_second
+        if skew_seconds:
+            epoch -= rng.randint(0, skew_seconds)
+        stamp = stamp_cache.get(epoch)
+        if stamp is None:
+            if len(stamp_cache) > 4096:
+                stamp_cache.clear()
+            stamp = stamp_cache[epoch] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+        latency = rng.lognormvariate(mu, 0.8)
+        if rng.random() < error_rate:
+            error = rng.choices(errors, weights)[0]
+            lines = [f"{stamp} ERROR {error} cost={latency * 10:.0f}ms"]
+            for depth in range(stack_depth):
+                lines.append(f"\tat com.example.service.Handler{depth}.handle(Handler{depth}.java:{rng.randint(10, 500)})")
+            record = '\n'.join(lines)
+        else:
+            record = f"{stamp} INFO {rng.choice(INFO_MESSAGES)} {latency:.0f}ms"
+        yield record
+        index += 1
+
+
+def generate_log_file(path, size, seed=0, batch_lines=10000, **options):
+    """
+    生成至少 size 字节的日志文件(在完整的记录处截止)，返回 (写入字节数, 行数)
+    size 可以是整数或 '1MB'、'10GB' 这样的字符串；其余参数见 iter_log_records
+    """
+    target = parse_size(size)
+    records = iter_log_records(seed, **options)
+    written = lines = 0
+    with open(path, 'wb') as f:
+        while written < target:
+            batch = []
+            for _ in range(batch_lines):
+                batch.append(next(records))
+            data = ('\n'.join(batch) + '\n').encode('utf-8')
+            f.write(data)
+            written += len(data)
+            lines += data.count(b'\n')
+    return written, lines
+
+
+# 测试用例
+def test_log_generator():
+    import os
+    import tempfile
+    from test_scenario_algorithms import analyze_log_times, find_error_patterns
+    from log_reader import iter_log_lines
+
+    print("=== 合成日志生成器测试 ===")
+
+    fd, path = tempfile.mkstemp(suffix='.log')
+    os.close(fd)
+    try:
+        size, lines = generate_log_file(path, '1MB', seed=1, error_rate=0.1, skew_seconds=2)
+        print(f"生成 {size} 字节, {lines} 行")
+        with open(path) as f:
+            for _ in range(3):
+                print(f"  {f.readline().rstrip()}")
+        print(f"每小时统计: {analyze_log_times(iter_log_lines(path))}")
+        print(f"错误统计: {find_error_patterns(iter_log_lines(path))}")
+
+        # 相同种子生成的文件完全相同
+        fd, again = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        generate_log_file(again, '1MB', seed=1, error_rate=0.1, skew_seconds=2)
+        with open(path, 'rb') as a, open(again, 'rb') as b:
+            print(f"结果可复现: {a.read() == b.read()}")
+        os.remove(again)
+    finally:
+        os.remove(path)
+
+    latencies = generate_latencies(5, seed=3)
+    print(f"响应时间样本: {[round(v, 1) for v in latencies]}")
+
+
+if __name__ == "__main__":
+    test_log_generator()
@@ -0,0 +1,182 @@
+# 京东测试开发 - 增量日志分析(断点续读)
+#
+# 每隔几分钟就要重新统计一次日志，而日志只会在末尾追加。
+# 每次都从头分析，耗时随文件变大线性增长。
+# 这里把 (inode, 已处理的字节偏移, 累计统计结果) 存到本地状态文件，
+# 下次只读取新追加的字节，耗时只和新增数据量有关。
+#
+# 需要处理的几种情况：
+#   1. 正常追加：inode 不变、文件变大，从上次偏移继续读
+#   2. 截断(copytruncate)：inode 不变，但文件变小或开头内容变了；上次偏移之后、截断之前写入的内容
+#      只在复制出来的旧文件里，先在开头内容相同的旧文件中读完这部分，再从头读当前文件
+#   3. 轮转(rename + 新建)：inode 变了，先在轮转后的文件(如 app.log.1)中读完上次剩下的部分，再从新文件开头读
+
+import json
+import os
+
+from log_reader import DEFAULT_CHUNK_SIZE, decode_lines, iter_log_chunks
+from test_scenario_algorithms import analyze_log_times, find_error_patterns
+
+DEFAULT_ANALYZERS = {
+    'hourly': analyze_log_times,
+    'errors': find_error_patterns,
+}
+FINGERPRINT_SIZE = 1024  # 用文件开头的字节识别"是不是同一个文件"
+
+
+def _fingerprint(path, size):
+    """文件开头 size 字节的摘要，用于识别截断后重新写入的文件"""
+    import hashlib
+
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(size)).hexdigest()
+
+
+def _last_line_end(path, start, size):
+    """返回 [start, size) 中最后一个换行符之后的位置，没有完整的行时返回 start"""
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > start:
+            step = min(DEFAULT_CHUNK_SIZE, pos - start)
+            f.seek(pos - step)
+            cut = f.read(step).rfind(b'\n')
+            if cut != -1:
+                return pos - step + cut + 1
+            pos -= step
+    return start
+
+
+def _analyze_range(path, start, end, analyzers, results):
+    """分析 [start, end) 区间，每个字节块只读一次，交给所有分析器后累加到 results"""
+    for block in iter_log_chunks(path, start=start, end=end):
+        lines = decode_lines(block)
+        for name, analyzer in analyzers.items():
+            counts = results.setdefault(name, {})
+            for key, count in analyzer(lines).items():
+                counts[key] = counts.get(key, 0) + count
+
+
+def _finish_rotated(rotated, offset, analyzers, results):
+    """旧文件不会再写入，从 offset 读到末尾(包括最后没有换行符的一行)"""
+    rotated_size = os.path.getsize(rotated)
+    if rotated_size > offset:
+        _analyze_range(rotated, offset, rotated_size, analyzers, results)
+
+
+def load_checkpoint(state_path, path):
+    """读取某个日志文件的检查点，不存在时返回 None"""
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, encoding='utf-8') as f:
+        return json.load(f).get(os.path.abspath(path))
+
+
+def save_checkpoint(state_path, path, checkpoint):
+    """
+    保存检查点
+    先写临时文件再原子替换，任务中途被杀掉也不会留下写了一半的状态文件
+    """
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+    state[os.path.abspath(path)] = checkpoint
+
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+
+def analyze_log_incremental(path, state_path, analyzers=None, rotated_paths=None):
+    """
+    增量分析日志文件，返回从第一次运行到现在的累计统计 {分析器名: 统计结果}
+    analyzers: {名称: 分析函数}，分析函数接收行列表、返回计数 dict，默认为每小时统计和错误统计
+    rotated_paths: 轮转后旧文件可能的路径，默认 [path + '.1']
+    末尾还没写完的半行不处理，留到下次运行
+    """
+    analyzers = analyzers or DEFAULT_ANALYZERS
+    rotated_paths = rotated_paths if rotated_paths is not None else [path + '.1']
+
+    checkpoint = load_checkpoint(state_path, path)
+    results = checkpoint['results'] if checkpoint else {}
+    stat = os.stat(path)
+    offset = 0
+
+    if checkpoint:
+        saved_size = min(checkpoint['offset'], FINGERPRINT_SIZE)
+        if checkpoint['inode'] == stat.st_ino:
+            if (stat.st_size >= checkpoint['offset']
+                    and _fingerprint(path, saved_size) == checkpoint['fingerprint']):
+                offset = checkpoint['offset']
+            else:
+                # 文件被截断过：复制出来的旧文件 inode 是新的，按开头内容找到它，读完上次剩下的部分
+                for rotated in rotated_paths:
+                    if (os.path.exists(rotated) and os.path.getsize(rotated) >= checkpoint['offset']
+                            and _fingerprint(rotated, saved_size) == checkpoint['fingerprint']):
+                        _finish_rotated(rotated, checkpoint['offset'], analyzers, results)
+                        break
+        else:
+            # 文件被轮转：在旧文件中把上次没读完的部分读完(包括最后没有换行符的一行)
+            for rotated in rotated_paths:
+                if os.path.exists(rotated) and os.stat(rotated).st_ino == checkpoint['inode']:
+                    _finish_rotated(rotated, checkpoint['offset'], analyzers, results)
+                    break
+
+    end = _last_line_end(path, offset, stat.st_size)
+    if end > offset:
+        _analyze_range(path, offset, end, analyzers, results)
+
+    save_checkpoint(state_path, path, {
+        'inode': stat.st_ino,
+        'offset': end,
+        'fingerprint': _fingerprint(path, min(end, FINGERPRINT_SIZE)),
+        'results': results,
+    })
+    return results
+
+
+# 测试用例
+def test_log_incremental():
+    import shutil
+    import tempfile
+
+    print("=== 增量日志分析测试 ===")
+
+    workdir = tempfile.mkdtemp()
+    log_path = os.path.join(workdir, 'app.log')
+    state_path = os.path.join(workdir, 'state.json')
+
+    def append(text):
+        with open(log_path, 'a') as f:
+            f.write(text)
+
+    try:
+        # 第一次运行：最后一行还没写完
+        append("2024-01-15 14:23:45 INFO User login successful\n"
+               "2024-01-15 14:24:12 ERROR SQLException: connection failed\n"
+               "2024-01-15 15:10:22 ERROR Timeout")
+        print(f"第一次: {analyze_log_incremental(log_path, state_path)}")
+
+        # 第二次运行：半行写完，又追加了新行，只处理新增部分
+        append("Exception: Request timeout\n2024-01-15 15:11:45 INFO User logout\n")
+        print(f"第二次: {analyze_log_incremental(log_path, state_path)}")
+
+        # 日志轮转：旧文件改名后还追加了一行，新文件重新开始写
+        append("2024-01-15 15:59:59 ERROR NullPointerException\n")
+        os.rename(log_path, log_path + '.1')
+        append("2024-01-15 16:00:01 INFO New file started\n")
+        print(f"轮转后: {analyze_log_incremental(log_path, state_path)}")
+
+        # copytruncate：又追加一行后复制到 app.log.1 再清空，16:30 这一行只在复制出来的文件里
+        append("2024-01-15 16:30:00 ERROR SQLException: deadlock\n")
+        shutil.copyfile(log_path, log_path + '.1')
+        with open(log_path, 'w') as f:
+            f.write("2024-01-15 17:00:00 ERROR FileNotFoundException\n")
+        print(f"截断后: {analyze_log_incremental(log_path, state_path)}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    test_log_incremental()
@@ -0,0 +1,248 @@
+# 京东测试开发 - 多进程分片日志分析
+#
+# analyze_log_times / find_error_patterns 都是单核运行，日志机有几十个核却只用上一个。
+# 思路：把文件切成按行对齐的字节区间，每个进程分析一个区间并返回一份很小的部分统计，
+# 父进程再把部分统计合并。计数类统计天然可以相加合并，所以结果与单进程完全一致。
+# 多成员 gzip 按成员边界分给多个进程并行解压；bz2/xz 无法低成本定位分界，退化为单进程流式解压。
+
+from log_reader import (DEFAULT_CHUNK_SIZE, decode_lines, detect_compression,
+                        iter_gzip_members, iter_log_lines, split_byte_ranges)
+from test_scenario_algorithms import analyze_log_times, find_error_patterns
+
+
+def _analyze_range(analyzer, path, start, end, chunk_size):
+    """子进程入口：只分析 [start, end) 区间，返回部分统计(dict)"""
+    lines = iter_log_lines(path, chunk_size, start=start, end=end)
+    return analyzer(lines)
+
+
+def _analyze_gzip_range(analyzer, path, start, end, chunk_size):
+    """
+    子进程入口：解压起始位置落在 [start, end) 的 gzip 成员并分析
+    成员边界不一定是行边界，首尾的半行原样返回给父进程拼接
+    返回 (head, partial, tail)：head 为第一个换行符之前的内容(start 为 0 时为 None)，
+    tail 为最后一个换行符之后的内容；整段没有换行符时 tail 为 None，全部内容放在 head
+    """
+    fragments = {}
+
+    def lines():
+        carry = b''
+        for block in iter_gzip_members(path, start, end, chunk_size):
+            data = carry + block
+            if start > 0 and 'head' not in fragments:
+                cut = data.find(b'\n')
+                if cut == -1:
+                    carry = data
+                    continue
+                fragments['head'] = data[:cut]
+                data = data[cut + 1:]
+            cut = data.rfind(b'\n')
+            if cut == -1:
+                carry = data
+                continue
+            carry = data[cut + 1:]
+            yield from decode_lines(data[:cut + 1])
+        if start > 0 and 'head' not in fragments:
+            fragments['head'] = carry
+            fragments['tail'] = None
+        else:
+            fragments['tail'] = carry
+
+    partial = analyzer(lines())
+    return fragments.get('head'), partial, fragments['tail']
+
+
+def _analyze_gzip_parallel(path, analyzer, workers, chunk_size):
+    """多进程并行解压多成员 gzip，拼接成员交界处的半行后合并结果"""
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = os.path.getsize(path)
+    # gzip 成员位置事先未知，这里只按大小均分，子进程各自找到区间内的第一个成员
+    ranges = [(size * i // workers, size * (i + 1) // workers) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_analyze_gzip_range, analyzer, path, start, end, chunk_size)
+                   for start, end in ranges]
+        results = [future.result() for future in futures]
+
+    partials = []
+    boundary_lines = []  # 跨越进程边界的行
+    carry = b''
+    for head, partial, tail in results:
+        partials.append(partial)
+        if head is None:
+            carry = tail
+        elif tail is None:
+            carry += head
+        else:
+            boundary_lines.append(carry + head + b'\n')
+            carry = tail
+    if carry:
+        boundary_lines.append(carry + b'\n')
+    if boundary_lines:
+        partials.append(analyzer(decode_lines(b''.join(boundary_lines))))
+
+    return merge_counts(partials)
+
+
+def merge_counts(partials):
+    """合并多个 {key: count} 形式的部分统计"""
+    merged = {}
+    for partial in partials:
+        for key, count in partial.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def analyze_file_parallel(path, analyzer, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    多进程分析日志文件
+    analyzer 是接收行迭代器、返回计数 dict 的模块级函数(需要能被 pickle)
+    压缩日志自动识别：gzip 按成员并行解压，bz2/xz 单进程流式解压
+    workers 为 1 时直接在当前进程执行，方便对比和调试
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    compression = detect_compression(path)
+    if compression == 'gzip' and workers > 1:
+        return _analyze_gzip_parallel(path, analyzer, workers, chunk_size)
+    if compression:
+        return analyzer(iter_log_lines(path, chunk_size))
+
+    ranges = split_byte_ranges(path, workers)
+    if workers == 1 or len(ranges) <= 1:
+        return merge_counts(_analyze_range(analyzer, path, start, end, chunk_size)
+                            for start, end in ranges)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_analyze_range, analyzer, path, start, end, chunk_size)
+                   for start, end in ranges]
+        return merge_counts(future.result() for future in futures)
+
+
+def analyze_log_times_parallel(path, workers=None):
+    """多进程统计每小时日志数量"""
+    return analyze_file_parallel(path, analyze_log_times, workers)
+
+
+def find_error_patterns_parallel(path, workers=None):
+    """多进程统计错误类型频次"""
+    return analyze_file_parallel(path, find_error_patterns, workers)
+
+
+MIN_BENCHMARK_SIZE = 64 << 20  # 小于 64MB 时耗时以进程启动开销为主，加速比没有意义
+
+
+def benchmark_scaling(path=None, max_workers=None, analyzer=analyze_log_times, size='256MB', seed=0,
+                      min_size=MIN_BENCHMARK_SIZE):
+    """
+    性能基准：统计 1 到 max_workers 个进程的耗时和加速比
+    path 为 None 时用 log_generator 生成 size 大小的合成日志，测完删除；
+    日志小于 min_size 字节时拒绝测试(抛 ValueError)
+    返回 [{'workers', 'seconds', 'speedup'}, ...]，同时打印扩展曲线
+    """
+    import os
+    import tempfile
+    import time
+
+    if path is None:
+        from log_generator import generate_log_file
+
+        fd, path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        try:
+            generate_log_file(path, size, seed=seed)
+            return benchmark_scaling(path, max_workers, analyzer, min_size=min_size)
+        finally:
+            os.remove(path)
+
+    size_bytes = os.path.getsize(path)
+    if size_bytes < min_size:
+        raise ValueError(f"{path} is {size_bytes} bytes, need at least {min_size} bytes "
+                         f"for a meaningful scaling benchmark")
+    max_workers = max_workers or os.cpu_count() or 1
+    size_mb = size_bytes / (1 << 20)
+    results = []
+    baseline = None
+
+    workers = 1
+    while True:
+        begin = time.perf_counter()
+        analyze_file_parallel(path, analyzer, workers)
+        seconds = time.perf_counter() - begin
+        baseline = baseline or seconds
+
+        row = {'workers': workers, 'seconds': seconds, 'speedup': baseline / seconds}
+        results.append(row)
+        print(f"workers={workers:>3}  {seconds:8.3f}s  {size_mb / seconds:8.1f} MB/s  "
+              f"speedup={row['speedup']:.2f}x")
+
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+    return results
+
+
+# 测试用例
+def test_log_parallel():
+    import os
+    import tempfile
+
+    print("=== 多进程分片日志分析测试 ===")
+
+    lines = [
+        "2024-01-15 14:23:45 INFO User login successful",
+        "2024-01-15 14:24:12 ERROR SQLException: Database connection failed",
+        "2024-01-15 15:10:22 ERROR TimeoutException: Request timeout",
+        "2024-01-15 16:01:02 ERROR java.lang.NullPointerException at UserService",
+    ] * 500
+    fd, path = tempfile.mkstemp(suffix='.log')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        hourly = analyze_log_times_parallel(path, workers=4)
+        errors = find_error_patterns_parallel(path, workers=4)
+        print(f"每小时日志统计: {hourly}")
+        print(f"与单进程一致: {hourly == analyze_log_times(lines)}")
+        print(f"错误类型统计: {errors}")
+        print(f"与单进程一致: {errors == find_error_patterns(lines)}")
+
+        # 多成员 gzip：每 1000 字节压缩成一个成员，成员边界故意落在行中间
+        import gzip
+        data = ('\n'.join(lines) + '\n').encode()
+        gz_path = path + '.gz'
+        with open(gz_path, 'wb') as f:
+            for i in range(0, len(data), 1000):
+                f.write(gzip.compress(data[i:i + 1000]))
+        try:
+            gz_hourly = analyze_log_times_parallel(gz_path, workers=4)
+            gz_errors = find_error_patterns_parallel(gz_path, workers=4)
+            print(f"多成员 gzip 并行解压结果一致: {gz_hourly == hourly and gz_errors == errors}")
+        finally:
+            os.remove(gz_path)
+
+        try:
+            benchmark_scaling(path, max_workers=4)
+        except ValueError as e:
+            print(f"测试数据太小，拒绝跑扩展曲线: {e}")
+    finally:
+        os.remove(path)
+
+    print(f"\n扩展曲线(64MB 合成日志，CPU 核数 {os.cpu_count()}):")
+    benchmark_scaling(max_workers=4, size='64MB')
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python log_parallel.py <日志文件> [最大进程数] 对真实日志跑扩展曲线
+    # python log_parallel.py bench [最大进程数]         生成 256MB 合成日志跑扩展曲线
+    if len(sys.argv) > 1:
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        benchmark_scaling(None if sys.argv[1] == 'bench' else sys.argv[1], workers)
+    else:
+        test_log_parallel()
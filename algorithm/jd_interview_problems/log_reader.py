@@ -0,0 +1,260 @@
+# 京东测试开发 - 大日志文件流式读取
+#
+# 夜间任务需要分析几个GB的访问日志，一次性 readlines() 会把内存撑爆。
+# 这里按固定大小的字节块读取文件，自己处理跨块的半行，
+# 内存占用只和块大小、最长一行有关，和文件大小无关。
+# 轮转后的 .gz/.bz2/.xz 日志按文件头自动识别，边解压边读取，不需要先解压到磁盘。
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 每次读取 1MB
+
+# 压缩格式的文件头(魔数)，按内容识别而不是按扩展名
+COMPRESSION_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+}
+GZIP_MEMBER_MAGIC = b'\x1f\x8b\x08'  # gzip 成员头 + deflate 压缩方法
+
+
+def detect_compression(path):
+    """根据文件头识别压缩格式，返回 'gzip'/'bz2'/'xz'，未压缩返回 None"""
+    with open(path, 'rb') as f:
+        header = f.read(6)
+    for name, magic in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return name
+    return None
+
+
+def open_log(path):
+    """以二进制方式打开日志，压缩文件返回边读边解压的文件对象"""
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        import bz2
+        return bz2.open(path, 'rb')
+    if compression == 'xz':
+        import lzma
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_log_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """
+    按字节块读取文件，每次产出若干完整行拼成的 bytes
+    跨块的半行留到下一块再拼接，保证产出的内容都以行为边界
+    start/end 指定只读取 [start, end) 字节区间，区间需与行边界对齐(见 split_byte_ranges)
+    压缩文件只能从头顺序解压，不支持指定区间
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if (start or end is not None) and detect_compression(path):
+        raise ValueError("byte ranges are only supported for uncompressed logs")
+
+    with open_log(path) as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        tail = b''  # 上一块末尾没读完的半行
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+
+            # 找到本块最后一个换行符，后面的部分留给下一块
+            cut = chunk.rfind(b'\n')
+            if cut == -1:
+                tail += chunk
+                continue
+
+            yield tail + chunk[:cut + 1]
+            tail = chunk[cut + 1:]
+
+        # 文件末尾没有换行符的最后一行
+        if tail:
+            yield tail
+
+
+def decode_lines(block, encoding='utf-8'):
+    """把若干完整行组成的 bytes 解码并切分成行列表(不含换行符)"""
+    text = block.decode(encoding, errors='replace')
+    # splitlines 会额外按 \r、\x0b 等切分，这里只按 \n 切分，和文件的行一一对应
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return [line[:-1] if line.endswith('\r') else line for line in lines]
+
+
+def iter_log_lines(path, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8', start=0, end=None):
+    """
+    逐行产出日志内容(str，不含换行符)
+    非法字节用替换字符代替，避免一行脏数据让整个任务失败
+    """
+    for block in iter_log_chunks(path, chunk_size, start, end):
+        yield from decode_lines(block, encoding)
+
+
+def split_byte_ranges(path, parts):
+    """
+    把文件切成 parts 段按换行符对齐的字节区间 [(start, end), ...]
+    先按大小均分，再把每个切点向后移动到下一行开头，保证没有一行被切成两半
+    """
+    import os
+
+    if parts <= 0:
+        raise ValueError("parts must be positive")
+
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            offset = size * i // parts
+            if offset <= bounds[-1]:
+                continue
+            f.seek(offset - 1)
+            f.readline()  # 跳到下一行开头(切点恰好在行首时不移动)
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def _is_gzip_member_start(f, offset, probe_size=1 << 16):
+    """
+    判断 offset 处是否是真正的 gzip 成员开头
+    压缩数据里也可能碰巧出现成员头字节，试着解压一段，能正常解压才算数
+    """
+    import zlib
+
+    f.seek(offset)
+    decoder = zlib.decompressobj(31)  # 31 表示带 gzip 头和 CRC 校验
+    consumed = 0
+    try:
+        while consumed < probe_size and not decoder.eof:
+            data = f.read(min(8192, probe_size - consumed))
+            if not data:
+                return False
+            consumed += len(data)
+            decoder.decompress(data, 1 << 16)
+    except zlib.error:
+        return False
+    return True
+
+
+def find_gzip_member(path, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """在 [start, end) 中查找第一个 gzip 成员的起始偏移，找不到返回 None"""
+    with open(path, 'rb') as f:
+        pos = start
+        while pos < end:
+            f.seek(pos)
+            # 多读两个字节，避免成员头正好跨在两块之间
+            window = f.read(min(chunk_size, end - pos) + len(GZIP_MEMBER_MAGIC) - 1)
+            if len(window) < len(GZIP_MEMBER_MAGIC):
+                return None
+            i = window.find(GZIP_MEMBER_MAGIC)
+            while i != -1 and pos + i < end:
+                if _is_gzip_member_start(f, pos + i):
+                    return pos + i
+                i = window.find(GZIP_MEMBER_MAGIC, i + 1)
+            pos += chunk_size
+    return None
+
+
+def iter_gzip_members(path, start=0, end=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    解压起始偏移落在 [start, end) 中的所有 gzip 成员，产出解压后的 bytes 块
+    多成员 gzip(如 cat a.gz b.gz 或按块压缩的日志)可以按成员拆给多个进程并行解压
+    注意：成员边界不一定是行边界，调用方需要处理首尾的半行
+    """
+    import os
+    import zlib
+
+    if end is None:
+        end = os.path.getsize(path)
+    offset = find_gzip_member(path, start, end, chunk_size)
+    if offset is None:
+        return
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        decoder = zlib.decompressobj(31)
+        pending = b''  # 已读取、尚未交给解压器的数据
+        while True:
+            if decoder.eof:
+                # 一个成员结束，剩余数据是下一个成员的开头
+                pending = decoder.unused_data
+                pos = f.tell() - len(pending)
+                if pos >= end:
+                    break
+                if not pending:
+                    pending = f.read(chunk_size)
+                    if not pending:
+                        break
+                # 文件末尾的零填充不是新成员
+                if not pending.startswith(GZIP_MEMBER_MAGIC[:2]):
+                    break
+                decoder = zlib.decompressobj(31)
+            elif not pending:
+                pending = f.read(chunk_size)
+                if not pending:
+                    raise EOFError("compressed file ended before the end-of-stream marker")
+
+            # 限制单次解压输出大小，高压缩比的日志也不会一下子撑大内存
+            out = decoder.decompress(pending, chunk_size)
+            pending = decoder.unconsumed_tail
+            if out:
+                yield out
+
+
+# 测试用例
+def test_log_reader():
+    import os
+    import tempfile
+
+    print("=== 大日志流式读取测试 ===")
+
+    lines = [
+        "2024-01-15 14:23:45 INFO User login successful",
+        "2024-01-15 14:24:12 ERROR Database connection failed",
+        "2024-01-15 15:10:22 ERROR TimeoutException: Request timeout",
+    ]
+    fd, path = tempfile.mkstemp(suffix='.log')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(lines))  # 最后一行故意不带换行符
+
+        # 块大小故意设得很小，让每一行都跨越多个块
+        result = list(iter_log_lines(path, chunk_size=7))
+        print(f"读取行数: {len(result)}")
+        print(f"内容一致: {result == lines}")
+
+        # 切分成按行对齐的区间后分别读取，拼起来应与整体读取一致
+        ranges = split_byte_ranges(path, 4)
+        pieces = []
+        for start, end in ranges:
+            pieces.extend(iter_log_lines(path, chunk_size=7, start=start, end=end))
+        print(f"字节区间: {ranges}")
+        print(f"分段读取一致: {pieces == lines}")
+
+        # 压缩日志按文件头识别，读取结果与原文一致
+        import bz2
+        import gzip
+        import lzma
+        raw = '\n'.join(lines).encode()
+        for name, compress in (('gzip', gzip.compress), ('bz2', bz2.compress), ('xz', lzma.compress)):
+            with open(path, 'wb') as f:
+                f.write(compress(raw))
+            decoded = list(iter_log_lines(path, chunk_size=7))
+            print(f"{name}: 识别为 {detect_compression(path)}, 内容一致: {decoded == lines}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_log_reader()
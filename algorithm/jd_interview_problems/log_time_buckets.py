@@ -0,0 +1,223 @@
+# 京东测试开发 - 日志时间分桶统计引擎
+#
+# analyze_log_times 只能按小时统计，并且用 "YYYY-MM-DD HH" 字符串做 defaultdict 的 key，
+# 几千万行日志时，每行都要切字符串、算哈希，内存里也全是字符串。
+# 这里把时间戳解析成整数秒(epoch)，按秒/分/时/天任意粒度换算成桶下标，
+# 计数累加到预分配的 array('q') 中；可选按日志级别分组，每个级别一个数组。
+# 时间戳按日志里的本地时间原样换算(不做时区转换)，输出时再格式化回相同的字符串。
+# 数组总大小有上限：超出上限的离群时间戳(跨度过大、个别错误的时间戳)改记在按桶编号的 dict 中，
+# 不会中途报错，常见时间范围内仍然走数组。
+
+from array import array
+
+from test_scenario_algorithms import find_timestamp
+
+GRANULARITIES = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+# 各粒度输出时的标签格式，hour 与 analyze_log_times 的 key 保持一致
+LABEL_FORMATS = {
+    'second': '%Y-%m-%d %H:%M:%S',
+    'minute': '%Y-%m-%d %H:%M',
+    'hour': '%Y-%m-%d %H',
+    'day': '%Y-%m-%d',
+}
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL', 'OTHER')
+_LEVEL_CODES = {level: code for code, level in enumerate(LOG_LEVELS)}
+_LEVEL_CODES['WARNING'] = _LEVEL_CODES['WARN']
+MAX_BUCKETS = 50_000_000  # 所有数组(按级别分组时每个级别一个)合计最多 50M 个桶(400MB)，超出范围的桶记在 dict 中
+
+
+def days_from_civil(year, month, day):
+    """公历日期 -> 距 1970-01-01 的天数，纯整数运算，不依赖 datetime"""
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+_hour_cache = {}  # 'YYYY-MM-DD HH' -> 该小时开始的 epoch 秒，日志里不同的小时数很少
+
+
+def _hour_epoch(prefix):
+    epoch = _hour_cache.get(prefix)
+    if epoch is None:
+        days = days_from_civil(int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]))
+        epoch = days * 86400 + int(prefix[11:13]) * 3600
+        if len(_hour_cache) < 100000:
+            _hour_cache[prefix] = epoch
+    return epoch
+
+
+def parse_log_line(line):
+    """
+    解析一行日志，返回 (epoch 秒, 级别编码)，没有时间戳返回 None
+    """
+    start = find_timestamp(line)
+    if start < 0:
+        return None
+    stamp, rest = line[start:start + 19], start + 20
+
+    epoch = _hour_epoch(stamp[:13]) + int(stamp[14:16]) * 60 + int(stamp[17:19])
+    space = line.find(' ', rest)
+    level = line[rest:space] if space != -1 else line[rest:]
+    return epoch, _LEVEL_CODES.get(level, _LEVEL_CODES['OTHER'])
+
+
+class TimeBucketHistogram:
+    """
+    时间分桶直方图
+    桶下标 = epoch // 粒度 - 起始桶，计数存在 array('q') 中，按需向两端成倍扩展(两端可能有空桶)
+    数组扩展到 MAX_BUCKETS 后，范围外的桶记在 {桶编号: 数量} 的 dict 中
+    by_level=True 时每个日志级别一个数组
+    """
+
+    def __init__(self, granularity='hour', by_level=False):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown granularity: {granularity}")
+        self.granularity = granularity
+        self.by_level = by_level
+        self._step = GRANULARITIES[granularity]
+        self._base = None  # 第一个桶对应的桶编号(epoch // step)
+        self._counts = [array('q') for _ in (LOG_LEVELS if by_level else ('ALL',))]
+        self._sparse = [{} for _ in self._counts]  # 数组范围之外的桶: {桶编号: 数量}
+
+    def _reserve(self, bucket):
+        """保证 bucket 在数组范围内，返回它的下标；数组已到上限、放不下时返回 None"""
+        if self._base is None:
+            self._base = bucket
+        index = bucket - self._base
+        size = len(self._counts[0])
+        limit = MAX_BUCKETS // len(self._counts)  # 每个数组的上限
+        if index < 0:
+            # 比已有数据更早的时间戳(乱序日志)，向前扩展；与向后扩容一样按倍数预留，均摊 O(1)
+            if size - index > limit:
+                return None
+            grow = min(max(-index, size), limit - size)
+            for counts in self._counts:
+                counts[0:0] = array('q', bytes(8 * grow))
+            self._base -= grow
+            return index + grow
+        if index >= size:
+            if index >= limit:
+                return None
+            # 按倍数扩容，保证追加是均摊 O(1)
+            grow = min(max(index + 1 - size, size), limit - size)
+            for counts in self._counts:
+                counts.extend(array('q', bytes(8 * grow)))
+        return index
+
+    def add(self, epoch, level=0, count=1):
+        slot = level if self.by_level else 0
+        bucket = epoch // self._step
+        index = self._reserve(bucket)
+        if index is None:
+            sparse = self._sparse[slot]
+            sparse[bucket] = sparse.get(bucket, 0) + count
+        else:
+            self._counts[slot][index] += count
+
+    def add_lines(self, log_lines):
+        """解析并统计一批日志行，没有时间戳的行忽略"""
+        # 热循环里只做下标计算，越界时才走 _reserve 扩容
+        step, by_level = self._step, self.by_level
+        for line in log_lines:
+            parsed = parse_log_line(line)
+            if parsed is None:
+                continue
+            epoch, level = parsed
+            counts = self._counts[level if by_level else 0]
+            index = epoch // step - self._base if self._base is not None else -1
+            if not 0 <= index < len(counts):
+                index = self._reserve(epoch // step)
+                if index is None:
+                    self.add(epoch, level)
+                    continue
+            counts[index] += 1
+        return self
+
+    def counts(self, level=None):
+        """
+        返回某个级别(或合并后)的计数数组，下标 0 对应 start_epoch()
+        只包含数组范围内的桶，超出范围记在 dict 中的桶见 to_dict
+        """
+        if level is not None:
+            return self._counts[_LEVEL_CODES[level]]
+        if len(self._counts) == 1:
+            return self._counts[0]
+        total = array('q', bytes(8 * len(self._counts[0])))
+        for counts in self._counts:
+            for i, count in enumerate(counts):
+                total[i] += count
+        return total
+
+    def start_epoch(self):
+        return None if self._base is None else self._base * self._step
+
+    def _labelled(self, counts, sparse):
+        import time
+
+        fmt = LABEL_FORMATS[self.granularity]
+        buckets = [(self._base + i, count) for i, count in enumerate(counts) if count]
+        if sparse:
+            buckets = sorted(buckets + list(sparse.items()))
+        return {time.strftime(fmt, time.gmtime(bucket * self._step)): count for bucket, count in buckets}
+
+    def to_dict(self):
+        """
+        转换成 {时间标签: 数量}，只包含非零的桶
+        by_level=True 时返回 {级别: {时间标签: 数量}}
+        """
+        if self._base is None:
+            return {}
+        if not self.by_level:
+            return self._labelled(self._counts[0], self._sparse[0])
+        return {level: self._labelled(counts, sparse)
+                for level, counts, sparse in zip(LOG_LEVELS, self._counts, self._sparse)
+                if sparse or any(counts)}
+
+
+def analyze_log_buckets(log_lines, granularity='hour', by_level=False):
+    """
+    按任意粒度统计日志数量
+    granularity: second / minute / hour / day
+    """
+    return TimeBucketHistogram(granularity, by_level).add_lines(log_lines).to_dict()
+
+
+# 测试用例
+def test_log_time_buckets():
+    from test_scenario_algorithms import analyze_log_times
+
+    print("=== 日志时间分桶统计测试 ===")
+
+    log_lines = [
+        "2024-01-15 14:23:45 INFO User login successful",
+        "2024-01-15 14:24:12 ERROR Database connection failed",
+        "2024-01-15 14:24:30 INFO Order processed successfully",
+        "2024-01-15 15:10:22 ERROR TimeoutException: Request timeout",
+        "[app] 2024-01-16 09:00:01 WARN Disk usage high",
+        "no timestamp here",
+    ]
+    for granularity in GRANULARITIES:
+        print(f"{granularity}: {analyze_log_buckets(log_lines, granularity)}")
+
+    print(f"按级别分组: {analyze_log_buckets(log_lines, 'day', by_level=True)}")
+    print(f"与 analyze_log_times 一致: {analyze_log_buckets(log_lines) == analyze_log_times(log_lines)}")
+
+    # 离群时间戳超出数组上限时记在 dict 中，不会中途报错
+    outliers = [
+        "2024-01-15 14:23:45 INFO User login successful",
+        "2024-06-20 08:00:00 ERROR Database connection failed",  # 5 个月后，按秒分桶超出数组上限
+        "1970-01-01 00:00:01 WARN Clock reset",
+    ]
+    print(f"离群时间戳: {analyze_log_buckets(outliers, 'second', by_level=True)}")
+
+
+if __name__ == "__main__":
+    test_log_time_buckets()
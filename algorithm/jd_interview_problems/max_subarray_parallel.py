@@ -0,0 +1,299 @@
+# 京东测试开发 - 可合并的最大子数组和(分治 + 多进程)
+#
+# max_subarray 是单线程的 Kadane，只能处理内存里的 Python 列表。
+# 这里把每一段数据压缩成一个摘要 (长度, 总和, 最大前缀和, 最大后缀和, 最大子数组和) 以及它们的位置：
+#   merge(A, B).total  = A.total + B.total
+#   merge(A, B).prefix = max(A.prefix, A.total + B.prefix)
+#   merge(A, B).suffix = max(B.suffix, B.total + A.suffix)
+#   merge(A, B).best   = max(A.best, B.best, A.suffix + B.prefix)
+# merge 满足结合律，所以：
+#   - 大数组或内存映射的二进制文件切成若干段，每个进程算一段的摘要，父进程按顺序合并
+#   - 数据不断追加时，只需要计算新数据的摘要再合并进去(MaxSubarrayAccumulator)
+#   - 二维最大子矩阵：枚举上下边界，把中间的行按列求和压成一维，用同一个摘要函数求解
+# 子数组都是非空的，全部为负数时结果是最大的那个元素，与 max_subarray 一致。
+
+import os
+from array import array
+from typing import NamedTuple
+
+
+class SegmentSummary(NamedTuple):
+    """
+    一段数据的摘要，位置都是相对本段起点的下标
+    prefix 覆盖 [0, prefix_end)，suffix 覆盖 [suffix_start, length)，best 覆盖 [best_start, best_end)
+    """
+    length: int
+    total: float
+    prefix: float
+    prefix_end: int
+    suffix: float
+    suffix_start: int
+    best: float
+    best_start: int
+    best_end: int
+
+
+def summarize(values):
+    """单遍扫描计算一段数据的摘要，values 为空时返回 None(合并的单位元)"""
+    total = 0
+    prefix = best = current = None
+    prefix_end = best_start = best_end = current_start = 0
+    min_prefix, min_prefix_end = 0, 0  # 最小的真前缀和(可以为空)，用于求最大后缀
+    length = 0
+    for i, value in enumerate(values):
+        if i and total < min_prefix:
+            min_prefix, min_prefix_end = total, i
+        total += value
+        if prefix is None or total > prefix:
+            prefix, prefix_end = total, i + 1
+        # Kadane：以 i 结尾的最大子数组和
+        if current is not None and current > 0:
+            current += value
+        else:
+            current, current_start = value, i
+        if best is None or current > best:
+            best, best_start, best_end = current, current_start, i + 1
+        length = i + 1
+    if not length:
+        return None
+    return SegmentSummary(length, total, prefix, prefix_end, total - min_prefix, min_prefix_end,
+                          best, best_start, best_end)
+
+
+def merge(a, b):
+    """合并相邻的两段摘要(a 在前)，None 为单位元"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    offset = a.length
+    if a.total + b.prefix > a.prefix:
+        prefix, prefix_end = a.total + b.prefix, offset + b.prefix_end
+    else:
+        prefix, prefix_end = a.prefix, a.prefix_end
+    if b.total + a.suffix > b.suffix:
+        suffix, suffix_start = b.total + a.suffix, a.suffix_start
+    else:
+        suffix, suffix_start = b.suffix, offset + b.suffix_start
+    best, best_start, best_end = a.best, a.best_start, a.best_end
+    if b.best > best:
+        best, best_start, best_end = b.best, offset + b.best_start, offset + b.best_end
+    if a.suffix + b.prefix > best:
+        best, best_start, best_end = a.suffix + b.prefix, a.suffix_start, offset + b.prefix_end
+    return SegmentSummary(a.length + b.length, a.total + b.total, prefix, prefix_end,
+                          suffix, suffix_start, best, best_start, best_end)
+
+
+def merge_all(summaries):
+    result = None
+    for summary in summaries:
+        result = merge(result, summary)
+    return result
+
+
+def _summarize_file_range(path, typecode, start, end):
+    """子进程入口：内存映射文件，计算第 start ~ end 个元素的摘要"""
+    import mmap
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        view = memoryview(mapped).cast('B')
+        itemsize = array(typecode).itemsize
+        segment = view[start * itemsize:end * itemsize].cast(typecode)
+        try:
+            return summarize(segment)
+        finally:
+            segment.release()
+            view.release()
+    finally:
+        mapped.close()
+
+
+def _split(length, parts):
+    """把 [0, length) 切成 parts 段，返回 (start, end) 列表"""
+    parts = max(1, min(parts, length))
+    step, extra = divmod(length, parts)
+    bounds = []
+    start = 0
+    for i in range(parts):
+        end = start + step + (1 if i < extra else 0)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def summarize_parallel(values, workers=None, chunks_per_worker=4):
+    """
+    多进程计算 values(list / array / 任意支持切片的序列)的摘要
+    workers 为 1 时直接在当前进程计算，方便对比和调试
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(values) < 2:
+        return summarize(values)
+    bounds = _split(len(values), workers * chunks_per_worker)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map 保持提交顺序，合并时相邻段依次合并
+        return merge_all(pool.map(summarize, (values[start:end] for start, end in bounds)))
+
+
+def summarize_file(path, typecode='d', workers=None, chunks_per_worker=4):
+    """
+    多进程计算二进制文件(array.tofile 写出的定长数值)的摘要
+    每个进程内存映射整个文件，只读自己那一段，数据不经过 pickle
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    itemsize = array(typecode).itemsize
+    size = os.path.getsize(path)
+    if size % itemsize:
+        raise ValueError(f"file size {size} is not a multiple of item size {itemsize}")
+    length = size // itemsize
+    if not length:
+        return None
+    workers = workers or os.cpu_count() or 1
+    bounds = _split(length, workers * chunks_per_worker)
+    if workers == 1:
+        return merge_all(_summarize_file_range(path, typecode, start, end) for start, end in bounds)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_summarize_file_range, path, typecode, start, end) for start, end in bounds]
+        return merge_all(future.result() for future in futures)
+
+
+def max_subarray_parallel(values, workers=None):
+    """与 max_subarray 相同的结果：最大子数组和，空数组返回 0"""
+    summary = summarize_parallel(values, workers)
+    return 0 if summary is None else summary.best
+
+
+class MaxSubarrayAccumulator:
+    """数据不断追加时增量维护最大子数组和，每次只扫描新追加的数据"""
+
+    def __init__(self):
+        self.summary = None
+
+    def extend(self, values):
+        self.summary = merge(self.summary, summarize(values))
+        return self
+
+    @property
+    def best(self):
+        return 0 if self.summary is None else self.summary.best
+
+    @property
+    def best_range(self):
+        """最大子数组在全部数据中的下标区间 [start, end)"""
+        return None if self.summary is None else (self.summary.best_start, self.summary.best_end)
+
+
+def _max_submatrix_rows(matrix, top_rows):
+    """固定若干个上边界，向下扩展下边界，返回其中最好的 (和, 上, 左, 下, 右)"""
+    cols = len(matrix[0])
+    best = None
+    for top in top_rows:
+        column_sums = [0] * cols
+        for bottom in range(top, len(matrix)):
+            row = matrix[bottom]
+            for c in range(cols):
+                column_sums[c] += row[c]
+            summary = summarize(column_sums)
+            if best is None or summary.best > best[0]:
+                best = (summary.best, top, summary.best_start, bottom + 1, summary.best_end)
+    return best
+
+
+def max_submatrix(matrix, workers=1):
+    """
+    二维最大子矩阵和，O(rows^2 * cols)
+    返回 (和, (上, 左, 下, 右))，行列区间都是左闭右开；用于在延迟热力图(时间 × 接口)中找最热的区域
+    空矩阵与 max_subarray 的空数组一样返回和 0，区间为空矩形 (0, 0, 0, 0)
+    workers > 1 时按上边界分给多个进程
+    """
+    if not matrix or not matrix[0]:
+        return 0, (0, 0, 0, 0)
+    if any(len(row) != len(matrix[0]) for row in matrix):
+        raise ValueError("all rows must have the same length")
+    rows = len(matrix)
+    if rows > len(matrix[0]):
+        # 行数多时转置，让 O(rows^2) 的那一维更短
+        value, (left, top, right, bottom) = max_submatrix([list(col) for col in zip(*matrix)], workers)
+        return value, (top, left, bottom, right)
+
+    if workers == 1:
+        best = _max_submatrix_rows(matrix, range(rows))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # 上边界越小要扫描的下边界越多，交错分配让每个进程的工作量接近
+        groups = [range(i, rows, workers) for i in range(min(workers, rows))]
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            results = list(pool.map(_max_submatrix_rows, [matrix] * len(groups), groups))
+        best = max(results, key=lambda r: r[0])
+    value, top, left, bottom, right = best
+    return value, (top, left, bottom, right)
+
+
+# 测试用例
+def test_max_subarray_parallel():
+    import random
+    import tempfile
+    import time
+    from advanced_algorithms import max_subarray
+
+    print("=== 可合并的最大子数组和测试 ===")
+
+    nums = [-2, 1, -3, 4, -1, 2, 1, -5, 4]
+    summary = summarize(nums)
+    print(f"摘要: {summary}")
+    print(f"按任意位置切开再合并结果相同: "
+          f"{all(merge(summarize(nums[:i]), summarize(nums[i:])) == summary for i in range(len(nums) + 1))}")
+
+    rng = random.Random(0)
+    for _ in range(200):
+        data = [rng.randint(-20, 10) for _ in range(rng.randint(1, 50))]
+        parts = sorted(rng.sample(range(1, len(data) + 1), min(3, len(data))))
+        merged = merge_all(summarize(data[a:b]) for a, b in zip([0] + parts, parts + [len(data)]))
+        if merged.best != max_subarray(data) or sum(data[merged.best_start:merged.best_end]) != merged.best:
+            print(f"结果不一致: {data}")
+            break
+    else:
+        print("200 组随机数据分段合并与 max_subarray 一致")
+
+    accumulator = MaxSubarrayAccumulator()
+    for i in range(0, len(nums), 4):
+        accumulator.extend(nums[i:i + 4])
+    print(f"增量追加: best={accumulator.best}, 区间={accumulator.best_range}")
+
+    # 大数组写成二进制文件，多进程内存映射计算
+    data = array('d', (rng.gauss(0, 1) for _ in range(500000)))
+    fd, path = tempfile.mkstemp(suffix='.bin')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            data.tofile(f)
+        begin = time.perf_counter()
+        expected = max_subarray(data)
+        single = time.perf_counter() - begin
+        begin = time.perf_counter()
+        result = summarize_file(path, 'd', workers=4)
+        print(f"50 万个 float64: 单线程 {single:.3f}s, 4 进程内存映射 {time.perf_counter() - begin:.3f}s, "
+              f"结果一致: {abs(result.best - expected) < 1e-6}")
+        print(f"数组多进程结果一致: {abs(max_subarray_parallel(data, workers=2) - expected) < 1e-6}")
+    finally:
+        os.remove(path)
+
+    # 延迟热力图：行为分钟，列为接口，减去基线后找持续偏高的区域
+    heatmap = [[rng.gauss(-1, 1) for _ in range(20)] for _ in range(60)]
+    for minute in range(30, 40):
+        for api in range(5, 9):
+            heatmap[minute][api] += 5
+    value, (top, left, bottom, right) = max_submatrix(heatmap)
+    print(f"热力图最热区域: 分钟 [{top}, {bottom}), 接口 [{left}, {right}), 和 {value:.1f}")
+    print(f"多进程结果一致: {max_submatrix(heatmap, workers=2) == (value, (top, left, bottom, right))}")
+    value, (top, left, bottom, right) = max_submatrix([])
+    print(f"空矩阵: 和 {value}, 区间 [{top}, {bottom}) x [{left}, {right})")
+
+
+if __name__ == "__main__":
+    test_max_subarray_parallel()
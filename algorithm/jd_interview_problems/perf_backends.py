@@ -0,0 +1,173 @@
+# 京东测试开发 - 性能测试分析的计算后端
+#
+# 原来的 performance_test_analysis 调用三次 statistics.quantiles，每次都重新排序，
+# 还要求输入是 Python list。离线报告动辄上千万个样本，主要时间都花在排序和装箱上。
+# 这里只排序一次，所有分位数直接在排好序的数据上按下标插值：
+#   - python 后端：纯 Python 实现，任何可迭代对象都能用
+#   - numpy 后端：接受 array.array / memoryview / NumPy 数组，通过缓冲区协议直接访问，不转成 list，
+#     排序、求和、取分位数都是向量化操作
+# 分位数算法与 statistics.quantiles 默认的 exclusive 方法一致，两个后端结果相同。
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，没有安装时只能用 python 后端
+    np = None
+
+# 与原实现一致的分位点：(n, i) 表示把数据分成 n 份后的第 i 个切点
+CUT_POINTS = {
+    'p90_response_time': (10, 9),
+    'p95_response_time': (20, 19),
+    'p99_response_time': (100, 99),
+}
+
+
+def _exclusive_quantile(data, n, i):
+    """在已排序的 data 上计算 statistics.quantiles(data, n=n)[i - 1]"""
+    size = len(data)
+    if size == 1:
+        return data[0]
+    m = size + 1
+    j = min(max(i * m // n, 1), size - 1)
+    delta = i * m - j * n
+    return (data[j - 1] * (n - delta) + data[j] * delta) / n
+
+
+def _median(data):
+    size = len(data)
+    mid = size // 2
+    if size % 2:
+        return data[mid]
+    return (data[mid - 1] + data[mid]) / 2
+
+
+def _build_analysis(size, data, total):
+    """data 为排好序的样本，total 为样本之和"""
+    analysis = {
+        'total_requests': size,
+        'min_response_time': data[0],
+        'max_response_time': data[-1],
+        'avg_response_time': total / size,
+        'median_response_time': _median(data),
+    }
+    for key, (n, i) in CUT_POINTS.items():
+        analysis[key] = _exclusive_quantile(data, n, i)
+
+    # 计算TPS (Transactions Per Second)
+    total_time = total / 1000  # 转换为秒
+    if total_time > 0:
+        analysis['tps'] = size / total_time
+    return analysis
+
+
+def analyze_python(response_times):
+    """纯 Python 后端：排序一次，所有指标都从排好序的列表中取"""
+    import math
+
+    data = sorted(response_times)
+    if not data:
+        return {}
+    return _build_analysis(len(data), data, math.fsum(data))
+
+
+def analyze_numpy(response_times):
+    """
+    NumPy 后端
+    np.asarray 对 array.array / memoryview / ndarray 通过缓冲区协议直接建立视图，不复制数据；
+    只有排序时复制一份，避免修改调用方的数据
+    """
+    if np is None:
+        raise ImportError("numpy is required for the numpy backend")
+
+    values = np.asarray(response_times)
+    if values.size == 0:
+        return {}
+    data = np.sort(values)
+
+    analysis = _build_analysis(int(data.size), data, data.sum(dtype=np.float64))
+    # 转回 Python 数值，输出与 python 后端一致
+    return {key: value.item() if hasattr(value, 'item') else value for key, value in analysis.items()}
+
+
+def analyze_response_times(response_times, backend='auto'):
+    """
+    按指定后端计算性能指标
+    backend: 'python' / 'numpy' / 'auto'(输入支持缓冲区协议且安装了 numpy 时用 numpy)
+    """
+    if backend == 'auto':
+        is_buffer = not isinstance(response_times, (list, tuple))
+        if is_buffer:
+            try:
+                memoryview(response_times)
+            except TypeError:
+                is_buffer = False
+        backend = 'numpy' if np is not None and is_buffer else 'python'
+
+    if backend == 'numpy':
+        return analyze_numpy(response_times)
+    if backend == 'python':
+        return analyze_python(response_times)
+    raise ValueError(f"unknown backend: {backend}")
+
+
+def benchmark_backends(sizes=(10 ** 4, 10 ** 6, 10 ** 8), python_limit=10 ** 7):
+    """
+    对比两个后端在不同样本量下的耗时
+    纯 Python 后端超过 python_limit 个样本时跳过(1e8 个 float 装箱后需要几个 GB 内存)
+    """
+    import random
+    import time
+    from array import array
+
+    rows = []
+    for size in sizes:
+        random.seed(size)
+        samples = array('d', (random.expovariate(1 / 200) for _ in range(size)))
+        row = {'size': size}
+        for backend in ('python', 'numpy'):
+            if (backend == 'numpy' and np is None) or (backend == 'python' and size > python_limit):
+                row[backend] = None
+                continue
+            begin = time.perf_counter()
+            analyze_response_times(samples, backend)
+            row[backend] = time.perf_counter() - begin
+        rows.append(row)
+
+        python_cost = f"{row['python']:.3f}s" if row['python'] is not None else 'skipped'
+        numpy_cost = f"{row['numpy']:.3f}s" if row['numpy'] is not None else 'skipped'
+        print(f"size={size:>11,}  python={python_cost:>9}  numpy={numpy_cost:>9}")
+    return rows
+
+
+# 测试用例
+def test_perf_backends():
+    import statistics
+    from array import array
+
+    print("=== 性能测试分析计算后端测试 ===")
+
+    response_times = [100, 150, 200, 120, 180, 300, 250, 160, 140, 220]  # 毫秒
+    result = analyze_python(response_times)
+    print(f"python 后端: {result}")
+    print(f"p95 与 statistics.quantiles 一致: "
+          f"{result['p95_response_time'] == statistics.quantiles(response_times, n=20)[18]}")
+
+    samples = array('d', response_times)
+    if np is not None:
+        import math
+        fast, slow = analyze_numpy(samples), analyze_python(samples)
+        print(f"numpy 后端与 python 后端一致: {all(math.isclose(fast[k], slow[k]) for k in slow)}")
+    else:
+        print("未安装 numpy，跳过 numpy 后端")
+
+    print("\n后端耗时对比:")
+    benchmark_backends(sizes=(10 ** 4, 10 ** 5))
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python perf_backends.py bench 跑完整的 1e4/1e6/1e8 对比
+    if sys.argv[1:] == ['bench']:
+        benchmark_backends()
+    else:
+        test_perf_backends()
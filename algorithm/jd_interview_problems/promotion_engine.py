@@ -0,0 +1,285 @@
+# 京东测试开发 - 编译型促销规则引擎
+#
+# calculate_discount 用 if/elif 判断字符串类型，每次只能按一条促销计算一种商品。
+# 大促时一个购物车往往同时命中多个促销(单品折扣、品类满减、买赠)，需要整车计价。这里：
+#   - 规则只编译一次：类型分派、参数校验都在编译时完成，计价时直接调用对应的计算函数
+#   - 规则按 SKU / 品类建索引，购物车只计算与它的商品相关的规则，没有适用范围的规则对全场生效
+#   - 按优先级(priority 小的先算)依次叠加，每条规则以前面规则折后的价格为基数；
+#     exclusive 规则生效后，它覆盖的商品不再参与后面的规则
+#   - 每个 (SKU, 品类) 适用哪些规则做记忆化，只在第一次遇到时查索引
+#   - 批量计价时整批购物车的商品行平铺在一起，每条规则对整批只调用一次，而不是每个购物车调用一次
+#
+# 支持的规则类型：
+#   percentage   {'value': 10}                         覆盖商品打 9 折
+#   fixed        {'value': 20}                         覆盖商品合计立减 20(不低于 0)
+#   buy_x_get_y  {'x': 2, 'y': 1}                      同一商品每买 2 件送 1 件
+#   threshold    {'threshold': 300, 'amount': 40,      覆盖商品合计满 300 减 40，
+#                 'repeat': True}                      repeat 为 True 时每满 300 减 40
+
+RULE_TYPES = ('percentage', 'fixed', 'buy_x_get_y', 'threshold')
+# percentage / buy_x_get_y 逐个商品行计算，整批购物车的商品行一次算完；
+# fixed / threshold 按购物车汇总后计算
+CART_LEVEL_TYPES = ('fixed', 'threshold')
+
+
+def _spread(totals, idx, discount, subtotal):
+    """把整单优惠按金额比例分摊到各商品行，后面的规则看到的是分摊后的价格"""
+    ratio = 1 - discount / subtotal
+    for i in idx:
+        totals[i] *= ratio
+
+
+def _compile_rule(rule):
+    """
+    规则 dict -> 计算函数 apply(totals, quantities, idx)
+    商品行级规则返回实际有优惠的商品行下标列表；购物车级规则 idx 为一个购物车的商品行，返回优惠金额
+    """
+    kind = rule.get('type')
+    if kind == 'percentage':
+        value = rule['value']
+        if not 0 <= value <= 100:
+            raise ValueError("percentage must be in [0, 100]")
+        factor = 1 - value / 100
+
+        def apply(totals, quantities, idx):
+            if factor == 1:
+                return []
+            for i in idx:
+                totals[i] *= factor
+            return [i for i in idx if totals[i]]
+
+    elif kind == 'fixed':
+        value = rule['value']
+        if value < 0:
+            raise ValueError("fixed discount must be non-negative")
+
+        def apply(totals, quantities, idx):
+            subtotal = sum(totals[i] for i in idx)
+            discount = min(value, subtotal)
+            if discount:
+                _spread(totals, idx, discount, subtotal)
+            return discount
+
+    elif kind == 'buy_x_get_y':
+        x, y = rule['x'], rule['y']
+        if x < 1 or y < 1:
+            raise ValueError("buy_x_get_y requires x >= 1 and y >= 1")
+        group = x + y
+
+        def apply(totals, quantities, idx):
+            discounted = []
+            for i in idx:
+                quantity = quantities[i]
+                if quantity >= group and totals[i]:
+                    totals[i] -= totals[i] * (quantity // group * y) / quantity
+                    discounted.append(i)
+            return discounted
+
+    elif kind == 'threshold':
+        threshold, amount = rule['threshold'], rule['amount']
+        repeat = rule.get('repeat', False)
+        if threshold <= 0 or amount < 0:
+            raise ValueError("threshold must be positive and amount non-negative")
+
+        def apply(totals, quantities, idx):
+            subtotal = sum(totals[i] for i in idx)
+            if subtotal < threshold:
+                return 0
+            discount = min(amount * (subtotal // threshold if repeat else 1), subtotal)
+            if discount:
+                _spread(totals, idx, discount, subtotal)
+            return discount
+
+    else:
+        raise ValueError(f"unknown rule type: {kind}")
+    return apply
+
+
+class PromotionEngine:
+    """
+    促销规则引擎
+    rules: 规则 dict 列表，公共字段：
+        name       规则名称，默认 'rule<i>'
+        type       见 RULE_TYPES
+        skus       适用的 SKU 列表
+        categories 适用的品类列表(与 skus 取并集；两者都没有时全场适用)
+        priority   叠加顺序，小的先算，默认 0；相同优先级按规则列表中的顺序
+        exclusive  为 True 时，生效后它覆盖的商品不再参与后面的规则
+    购物车为商品行列表 [(sku, 品类, 单价, 数量), ...]
+    """
+
+    def __init__(self, rules):
+        self._rules = []  # (名称, 计算函数, 是否购物车级, exclusive)
+        self._by_sku = {}
+        self._by_category = {}
+        self._global = []
+        order = sorted(range(len(rules)), key=lambda i: rules[i].get('priority', 0))
+        for rank, i in enumerate(order):
+            rule = rules[i]
+            self._rules.append((rule.get('name', f'rule{i}'), _compile_rule(rule),
+                                rule['type'] in CART_LEVEL_TYPES, rule.get('exclusive', False)))
+            skus, categories = rule.get('skus'), rule.get('categories')
+            if not skus and not categories:
+                self._global.append(rank)
+            for sku in skus or ():
+                self._by_sku.setdefault(sku, []).append(rank)
+            for category in categories or ():
+                self._by_category.setdefault(category, []).append(rank)
+        self._line_cache = {}  # (sku, 品类) -> 适用的规则编号，记忆化
+
+    def _line_rules(self, sku, category):
+        key = (sku, category)
+        ranks = self._line_cache.get(key)
+        if ranks is None:
+            ranks = self._line_cache[key] = tuple(sorted(set(
+                self._global + self._by_sku.get(sku, []) + self._by_category.get(category, []))))
+        return ranks
+
+    def price_cart(self, cart):
+        """
+        整车计价，返回 {'subtotal': 原价合计, 'discount': 优惠合计, 'total': 应付金额, 'applied': 生效的规则名}
+        """
+        return self.price_carts([cart])[0]
+
+    def price_carts(self, carts):
+        """
+        批量计价，返回与 carts 一一对应的结果列表
+        整批购物车的商品行平铺在一起，每条规则对整批只调用一次(购物车级规则按购物车分组调用)
+        """
+        totals = []
+        quantities = []
+        line_cart = []
+        lines_by_rule = {}
+        line_cache = self._line_cache
+        line_rules = self._line_rules
+        for c, cart in enumerate(carts):
+            for sku, category, price, quantity in cart:
+                j = len(totals)
+                totals.append(price * quantity)
+                quantities.append(quantity)
+                line_cart.append(c)
+                ranks = line_cache.get((sku, category))
+                if ranks is None:
+                    ranks = line_rules(sku, category)
+                for rank in ranks:
+                    lines = lines_by_rule.get(rank)
+                    if lines is None:
+                        lines_by_rule[rank] = [j]
+                    else:
+                        lines.append(j)
+        subtotals = [0] * len(carts)
+        for c, total in zip(line_cart, totals):
+            subtotals[c] += total
+
+        applied = [[] for _ in carts]
+        blocked = None  # exclusive 规则已生效的商品行
+        for rank in sorted(lines_by_rule):
+            name, apply, cart_level, exclusive = self._rules[rank]
+            lines = lines_by_rule[rank]
+            if blocked:
+                lines = [j for j in lines if j not in blocked]
+            if cart_level:
+                # 商品行按购物车顺序排列，相邻的同一购物车的商品行为一组
+                discounted = []
+                begin = 0
+                while begin < len(lines):
+                    c = line_cart[lines[begin]]
+                    end = begin + 1
+                    while end < len(lines) and line_cart[lines[end]] == c:
+                        end += 1
+                    group = lines[begin:end]
+                    if apply(totals, quantities, group):
+                        applied[c].append(name)
+                        if exclusive:
+                            discounted += group
+                    begin = end
+            else:
+                discounted = apply(totals, quantities, lines)
+                for j in discounted:
+                    names = applied[line_cart[j]]
+                    if not names or names[-1] is not name:
+                        names.append(name)
+            if exclusive and discounted:
+                blocked = (blocked or set()).union(discounted)
+
+        payable = [0] * len(carts)
+        for c, total in zip(line_cart, totals):
+            payable[c] += total
+        results = []
+        for subtotal, total, names in zip(subtotals, payable, applied):
+            total = round(total, 2)
+            results.append({'subtotal': subtotal, 'discount': round(subtotal - total, 2),
+                            'total': total, 'applied': names})
+        return results
+
+
+def benchmark_promotions(cart_count=200000, sku_count=10000, category_count=100, seed=0):
+    """大促流量模拟：几十条规则、上万 SKU，测量每秒计价的购物车数"""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    skus = [(f'sku{i}', f'cat{i % category_count}', rng.randint(10, 2000)) for i in range(sku_count)]
+    rules = [{'name': 'plus_member', 'type': 'percentage', 'value': 5, 'priority': 9}]
+    for c in range(0, category_count, 5):
+        rules.append({'name': f'cat{c}_300_40', 'type': 'threshold', 'threshold': 300, 'amount': 40,
+                      'repeat': True, 'categories': [f'cat{c}'], 'priority': 5})
+    for i in range(0, sku_count, 50):
+        rules.append({'name': f'sku{i}_b2g1', 'type': 'buy_x_get_y', 'x': 2, 'y': 1, 'skus': [f'sku{i}'],
+                      'priority': 1, 'exclusive': True})
+    for i in range(25, sku_count, 50):
+        rules.append({'name': f'sku{i}_20off', 'type': 'percentage', 'value': 20, 'skus': [f'sku{i}'],
+                      'priority': 1})
+    engine = PromotionEngine(rules)
+
+    # 热门商品集中：80% 的购物车商品来自 1% 的 SKU
+    hot = skus[:sku_count // 100]
+    carts = [[(sku, category, price, rng.randint(1, 4))
+              for sku, category, price in (rng.choice(hot) if rng.random() < 0.8 else rng.choice(skus)
+                                           for _ in range(rng.randint(1, 5)))]
+             for _ in range(cart_count)]
+
+    begin = time.perf_counter()
+    results = engine.price_carts(carts)
+    elapsed = time.perf_counter() - begin
+    print(f"{len(rules)} 条规则, {cart_count:,} 个购物车: {cart_count / elapsed:,.0f} 车/秒, "
+          f"平均优惠 {sum(r['discount'] for r in results) / cart_count:.2f}")
+    return cart_count / elapsed
+
+
+# 测试用例
+def test_promotion_engine():
+    print("=== 编译型促销规则引擎测试 ===")
+
+    engine = PromotionEngine([
+        {'name': '手机9折', 'type': 'percentage', 'value': 10, 'categories': ['phone'], 'priority': 1},
+        {'name': '耳机买2送1', 'type': 'buy_x_get_y', 'x': 2, 'y': 1, 'skus': ['earphone'], 'priority': 1,
+         'exclusive': True},
+        {'name': '全场每满300减40', 'type': 'threshold', 'threshold': 300, 'amount': 40, 'repeat': True,
+         'priority': 2},
+        {'name': '店铺券20', 'type': 'fixed', 'value': 20, 'priority': 3},
+    ])
+    cart = [
+        ('iphone', 'phone', 5999, 1),
+        ('earphone', 'audio', 99, 3),
+        ('case', 'accessory', 49, 2),
+    ]
+    result = engine.price_cart(cart)
+    print(f"购物车计价: {result}")
+
+    # 手动验算：手机 5999*0.9=5399.1；耳机 3 件送 1 件 198，不参与满减和店铺券；
+    # 满减基数 5399.1+98=5497.1，满 300 减 40 共 18 次减 720；再减店铺券 20
+    expected = round(5399.1 + 98 - 720 - 20 + 198, 2)
+    print(f"与手动验算一致: {result['total'] == expected}")
+
+    print()
+    benchmark_promotions(cart_count=100000)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['bench']:
+        benchmark_promotions()
+    else:
+        test_promotion_engine()
@@ -0,0 +1,267 @@
+# 京东测试开发 - 多字段 Schema 校验引擎
+#
+# validate_data_format 一次只能校验一种格式的一维列表，
+# 而真实的测试数据是 CSV/JSONL 文件，每一行有很多带类型的字段。
+# 这里根据 schema 为每一列预编译校验规则，从磁盘流式读取行；
+# 大文件按行对齐的字节区间分给多个进程，每个进程返回错误计数和少量失败样本，父进程合并。
+#
+# schema 示例：
+#   {
+#       'user_id': {'type': 'int', 'required': True, 'min': 1},
+#       'email':   {'type': 'email'},
+#       'age':     {'type': 'int', 'min': 0, 'max': 150},
+#       'level':   {'choices': ['gold', 'silver']},
+#   }
+# 支持的规则：type(str/int/float/email/phone/date)、required、min、max、max_length、pattern、choices
+# 注意：CSV 按行切分，不支持字段内带换行符的 CSV
+
+import csv
+import json
+import re
+
+from data_validation import ERROR_MESSAGES, get_format_checker
+from log_reader import decode_lines, iter_log_chunks, split_byte_ranges
+
+DEFAULT_SAMPLE_SIZE = 20  # 每次校验最多保留的失败样本数
+
+
+def _to_int(value):
+    """int() 会把 3.7 截断成 3，这里只接受整数值的浮点数"""
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"not an integral value: {value}")
+    return int(value)
+
+
+def _number_rule(cast, spec, type_name):
+    low, high = spec.get('min'), spec.get('max')
+
+    def check(value):
+        if isinstance(value, bool):
+            return f'not a valid {type_name}'  # JSON 的 true/false 不算数字
+        try:
+            number = cast(value)
+        except (TypeError, ValueError, OverflowError):
+            return f'not a valid {type_name}'
+        if low is not None and number < low:
+            return f'less than {low}'
+        if high is not None and number > high:
+            return f'greater than {high}'
+        return None
+
+    return check
+
+
+def _compile_rule(spec):
+    """把一列的规则编译成校验函数：合法返回 None，不合法返回错误信息"""
+    checks = []
+    value_type = spec.get('type', 'str')
+    if value_type == 'int':
+        checks.append(_number_rule(_to_int, spec, 'int'))
+    elif value_type == 'float':
+        checks.append(_number_rule(float, spec, 'float'))
+    elif value_type in ERROR_MESSAGES:
+        checker, message = get_format_checker(value_type), ERROR_MESSAGES[value_type]
+        checks.append(lambda value: None if checker(str(value)) else message)
+    elif value_type != 'str':
+        raise ValueError(f"unknown column type: {value_type}")
+
+    if 'max_length' in spec:
+        limit = spec['max_length']
+        checks.append(lambda value: f'longer than {limit}' if len(str(value)) > limit else None)
+    if 'pattern' in spec:
+        pattern = re.compile(spec['pattern'])
+        checks.append(lambda value: None if pattern.fullmatch(str(value)) else 'pattern mismatch')
+    if 'choices' in spec:
+        choices = frozenset(spec['choices'])
+        checks.append(lambda value: None if value in choices else 'not an allowed choice')
+
+    required = spec.get('required', False)
+
+    def check(value):
+        if value is None or value == '':
+            return 'missing required value' if required else None
+        for rule in checks:
+            error = rule(value)
+            if error is not None:
+                return error
+        return None
+
+    return check
+
+
+def compile_schema(schema):
+    """编译整个 schema，返回 [(列名, 校验函数)]，只在开始时执行一次"""
+    return [(column, _compile_rule(spec)) for column, spec in schema.items()]
+
+
+class _UnparsedRow:
+    """无法解析成一行记录的原始文本，校验时计为整行错误"""
+
+    __slots__ = ('text', 'error')
+
+    def __init__(self, text, error):
+        self.text = text
+        self.error = error
+
+
+def validate_rows(rows, compiled, sample_size=DEFAULT_SAMPLE_SIZE, first_row=1):
+    """
+    校验一批行(dict)，返回部分统计：
+    {'rows': 行数, 'invalid_rows': 不合法行数, 'error_counts': {'列名: 错误': 次数}, 'samples': [...]}
+    first_row 为第一行的行号，用于在样本中标出出错位置
+    无法解析的行(非法 JSON、不是对象的 JSON)计为 '_row: 错误' 并保留样本，不会中断校验
+    """
+    error_counts = {}
+    samples = []
+    total = invalid = 0
+    for row_no, row in enumerate(rows, first_row):
+        total += 1
+        errors = None
+        if isinstance(row, _UnparsedRow):
+            row, errors = row.text, [f'_row: {row.error}']
+        elif not isinstance(row, dict):
+            errors = ['_row: not a JSON object']
+        else:
+            for column, check in compiled:
+                error = check(row.get(column))
+                if error is not None:
+                    if errors is None:
+                        errors = []
+                    errors.append(f'{column}: {error}')
+        if errors is not None:
+            invalid += 1
+            for key in errors:
+                error_counts[key] = error_counts.get(key, 0) + 1
+            if len(samples) < sample_size:
+                samples.append({'row': row_no, 'data': row, 'errors': errors})
+    return {'rows': total, 'invalid_rows': invalid, 'error_counts': error_counts, 'samples': samples}
+
+
+def _iter_rows(path, file_format, header, start, end):
+    """读取 [start, end) 区间内的行，CSV 行按表头转成 dict；空行跳过"""
+    for block in iter_log_chunks(path, start=start, end=end):
+        lines = decode_lines(block)
+        if file_format == 'csv':
+            for values in csv.reader(lines):
+                if values:
+                    yield dict(zip(header, values))
+        else:
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield _UnparsedRow(line, 'invalid JSON')
+
+
+def _validate_range(path, file_format, header, schema, start, end, sample_size):
+    """子进程入口：校验一个字节区间(区间内的行号从 1 开始，由父进程换算成全局行号)"""
+    rows = _iter_rows(path, file_format, header, start, end)
+    return validate_rows(rows, compile_schema(schema), sample_size)
+
+
+def merge_results(partials, sample_size=DEFAULT_SAMPLE_SIZE):
+    """按区间顺序合并部分统计，把样本中的区间内行号换算成全局行号"""
+    merged = {'rows': 0, 'invalid_rows': 0, 'error_counts': {}, 'samples': []}
+    for partial in partials:
+        for sample in partial['samples']:
+            if len(merged['samples']) < sample_size:
+                merged['samples'].append(dict(sample, row=sample['row'] + merged['rows']))
+        merged['rows'] += partial['rows']
+        merged['invalid_rows'] += partial['invalid_rows']
+        for key, count in partial['error_counts'].items():
+            merged['error_counts'][key] = merged['error_counts'].get(key, 0) + count
+    return merged
+
+
+def validate_file(path, schema, workers=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    按 schema 校验 CSV/JSONL 文件(按扩展名识别，.jsonl/.json 为 JSONL，其余按 CSV)
+    workers 大于 1 时按行对齐的字节区间多进程并行校验
+    行号不含 CSV 表头，第一条数据为第 1 行
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    compile_schema(schema)  # 先在父进程编译一次，schema 写错时尽早报错
+    file_format = 'jsonl' if path.endswith(('.jsonl', '.json')) else 'csv'
+    header, data_start = None, 0
+    if file_format == 'csv':
+        with open(path, 'rb') as f:
+            first_line = f.readline()
+            data_start = f.tell()
+        # Excel 导出的 CSV 常带 UTF-8 BOM，不去掉的话第一列列名对不上
+        header = next(csv.reader([first_line.decode('utf-8-sig').rstrip('\r\n')]), [])
+
+    workers = workers or os.cpu_count() or 1
+    ranges = [(start, end) for start, end in split_byte_ranges(path, workers) if end > data_start]
+    ranges = [(max(start, data_start), end) for start, end in ranges]
+
+    if workers == 1 or len(ranges) <= 1:
+        partials = [_validate_range(path, file_format, header, schema, start, end, sample_size)
+                    for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [pool.submit(_validate_range, path, file_format, header, schema,
+                                   start, end, sample_size)
+                       for start, end in ranges]
+            partials = [future.result() for future in futures]
+    return merge_results(partials, sample_size)
+
+
+# 测试用例
+def test_schema_validation():
+    import os
+    import tempfile
+
+    print("=== 多字段 Schema 校验测试 ===")
+
+    schema = {
+        'user_id': {'type': 'int', 'required': True, 'min': 1},
+        'email': {'type': 'email'},
+        'phone': {'type': 'phone'},
+        'birthday': {'type': 'date'},
+        'level': {'choices': ['gold', 'silver', 'normal']},
+    }
+    rows = [
+        ['1', 'user@example.com', '13812345678', '1990-01-15', 'gold'],
+        ['2', 'invalid.email', '13812345678', '1990-02-30', 'silver'],
+        ['', 'test@gmail.com', '12345678901', '1985-06-01', 'vip'],
+        ['4', 'a@b.cn', '15912345678', '2000-12-31', 'normal'],
+    ] * 250
+
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(schema))
+            writer.writerows(rows)
+
+        result = validate_file(path, schema, workers=4, sample_size=3)
+        print(f"总行数: {result['rows']}, 不合法行数: {result['invalid_rows']}")
+        print(f"错误统计: {result['error_counts']}")
+        for sample in result['samples']:
+            print(f"  第 {sample['row']} 行: {sample['errors']}")
+        print(f"与单进程一致: {result == validate_file(path, schema, workers=1, sample_size=3)}")
+
+        # 带 BOM、含空行的 CSV：表头正常识别，空行不计数
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('user_id,email\r\n1,a@b.cn\r\n\r\n2,c@d.cn\r\n')
+        result = validate_file(path, {'user_id': schema['user_id'], 'email': schema['email']}, workers=1)
+        print(f"BOM + 空行 CSV: 总行数 {result['rows']}, 不合法行数 {result['invalid_rows']}")
+    finally:
+        os.remove(path)
+
+    # JSONL：坏行和非对象的行计为整行错误，不中断校验；int 列不接受 3.7 和 true
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('{"user_id": 1}\n{"user_id": 3.7}\n{"user_id": true}\n{broken\n[1, 2]\n\n{"user_id": 2.0}\n')
+        result = validate_file(path, {'user_id': schema['user_id']}, workers=1)
+        print(f"JSONL: 总行数 {result['rows']}, 不合法行数 {result['invalid_rows']}, 错误统计 {result['error_counts']}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_schema_validation()
@@ -0,0 +1,197 @@
+# 京东测试开发 - 滑动窗口 SLO 实时监控
+#
+# performance_test_analysis 的 TPS 用"请求数 / 响应时间之和"计算，
+# 只在请求串行执行时成立，并发压测时会严重低估；而且只能分析一批跑完的结果。
+# 这里提供压测过程中实时使用的监控：
+#   - 输入 (时间戳, 响应时间) 事件，统计最近 window_seconds 秒内的 p95/p99 和真实的墙钟吞吐量
+#   - 窗口按 slot_seconds 切成若干个时间片，组成环形缓冲区；每个时间片记录自己的对数分桶直方图，
+#     同时维护整个窗口的汇总直方图。时间片过期时把它的计数从汇总中减掉
+#   - 每个事件只做常数次操作，过期时减掉的计数总数不超过加入的计数，均摊 O(1)
+#   - 每个时间片结束时(滚动之前)用完整的窗口检查一次阈值，越过阈值或恢复时发出告警；
+#     min_tps 在窗口第一次填满之前不检查
+
+import math
+from array import array
+
+
+class SloMonitor:
+    """
+    滑动窗口 SLO 监控
+    thresholds: {'p95': 毫秒上限, 'p99': 毫秒上限, 'min_tps': 吞吐量下限}，任意子集
+    on_alert: 告警回调，参数为告警 dict；所有告警也会记录在 self.alerts 中
+    响应时间按 relative_accuracy 的相对误差分桶，超出 [min_latency, max_latency] 的值计入两端的桶
+    """
+
+    def __init__(self, window_seconds=60, slot_seconds=1, thresholds=None, on_alert=None,
+                 relative_accuracy=0.01, min_latency=0.01, max_latency=600000):
+        if window_seconds <= 0 or slot_seconds <= 0 or slot_seconds > window_seconds:
+            raise ValueError("require 0 < slot_seconds <= window_seconds")
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.thresholds = thresholds or {}
+        self.on_alert = on_alert
+        self.alerts = []
+        self._firing = set()
+
+        # 对数分桶：与 LatencySketch 相同的映射，但桶范围固定，用定长数组存储
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_key = math.ceil(math.log(min_latency) / self._log_gamma)
+        self._max_key = math.ceil(math.log(max_latency) / self._log_gamma)
+        self._window_hist = array('q', bytes(8 * (self._max_key - self._min_key + 1)))
+        self._window_count = 0
+
+        # 环形缓冲区：每个时间片的编号、请求数和稀疏直方图
+        self._slots = math.ceil(window_seconds / slot_seconds)
+        self._slot_ids = [None] * self._slots
+        self._slot_counts = [0] * self._slots
+        self._slot_hists = [{} for _ in range(self._slots)]
+        self._head = None   # 最新时间片编号
+        self._first = None  # 第一个事件所在的时间片编号
+
+    def _bucket(self, latency):
+        if latency <= 0:
+            return 0
+        key = math.ceil(math.log(latency) / self._log_gamma)
+        return min(max(key, self._min_key), self._max_key) - self._min_key
+
+    def _expire(self, index):
+        """把一个时间片的计数从窗口汇总中减掉并清空"""
+        for bucket, count in self._slot_hists[index].items():
+            self._window_hist[bucket] -= count
+        self._window_count -= self._slot_counts[index]
+        self._slot_hists[index] = {}
+        self._slot_counts[index] = 0
+        self._slot_ids[index] = None
+
+    def _advance(self, slot_id):
+        """窗口向前滚动到 slot_id，途经的旧时间片全部过期"""
+        while self._head < slot_id:
+            # 每个时间片结束时，在滚动之前用刚结束的完整窗口检查阈值，新时间片还是空的，不参与计算
+            self._check_thresholds((self._head + 1) * self.slot_seconds)
+            if not self._window_count:
+                self._head = slot_id - 1  # 窗口已经空了，之后每个时间片的检查结果都相同
+            self._head += 1
+            index = self._head % self._slots
+            if self._slot_ids[index] is not None:
+                self._expire(index)
+            self._slot_ids[index] = self._head
+
+    def record(self, timestamp, latency):
+        """
+        记录一个事件，timestamp 为秒，latency 为毫秒
+        比窗口还旧的事件直接丢弃，返回 False
+        """
+        slot_id = int(timestamp // self.slot_seconds)
+        if self._head is None:
+            self._head = self._first = slot_id
+            self._slot_ids[slot_id % self._slots] = slot_id
+        elif slot_id > self._head:
+            self._advance(slot_id)
+        elif slot_id <= self._head - self._slots:
+            return False
+
+        index = slot_id % self._slots
+        if self._slot_ids[index] != slot_id:
+            self._slot_ids[index] = slot_id  # 早于第一个事件、仍在窗口内的乱序事件
+        bucket = self._bucket(latency)
+        hist = self._slot_hists[index]
+        hist[bucket] = hist.get(bucket, 0) + 1
+        self._slot_counts[index] += 1
+        self._window_hist[bucket] += 1
+        self._window_count += 1
+        return True
+
+    def _percentiles(self, qs):
+        """在窗口汇总直方图上一次扫描计算多个分位数"""
+        result = {}
+        ranks = sorted((q * (self._window_count - 1), q) for q in qs)
+        seen = 0
+        pos = 0
+        for bucket, count in enumerate(self._window_hist):
+            seen += count
+            while pos < len(ranks) and ranks[pos][0] < seen:
+                key = bucket + self._min_key
+                result[ranks[pos][1]] = 2 * self._gamma ** key / (self._gamma + 1)
+                pos += 1
+            if pos == len(ranks):
+                break
+        return result
+
+    def snapshot(self):
+        """当前窗口的请求数、墙钟吞吐量和 p95/p99(毫秒)"""
+        if not self._window_count:
+            return {'count': 0, 'tps': 0.0, 'p95': None, 'p99': None}
+        # 刚开始运行、还没有填满窗口时，按实际经过的时间片计算吞吐量
+        slots = min(self._slots, self._head - self._first + 1)
+        quantiles = self._percentiles((0.95, 0.99))
+        return {
+            'count': self._window_count,
+            'tps': self._window_count / (slots * self.slot_seconds),
+            'p95': quantiles[0.95],
+            'p99': quantiles[0.99],
+        }
+
+    def _check_thresholds(self, timestamp):
+        if not self.thresholds:
+            return
+        current = self.snapshot()
+        for metric, threshold in self.thresholds.items():
+            if metric == 'min_tps':
+                if self._head - self._first + 1 < self._slots:
+                    continue  # 窗口还没有填满过一次，启动阶段不判断吞吐量，避免误报
+                value = current['tps']
+                breached = value < threshold
+            else:
+                value = current[metric]
+                breached = value is not None and value > threshold
+
+            # 只在状态变化时告警，避免每个时间片都重复发送
+            if breached == (metric in self._firing):
+                continue
+            if breached:
+                self._firing.add(metric)
+            else:
+                self._firing.discard(metric)
+            alert = {
+                'metric': metric,
+                'value': value,
+                'threshold': threshold,
+                'state': 'firing' if breached else 'resolved',
+                'timestamp': timestamp,
+            }
+            self.alerts.append(alert)
+            if self.on_alert:
+                self.on_alert(alert)
+
+
+# 测试用例
+def test_slo_monitor():
+    import random
+    import time
+
+    print("=== 滑动窗口 SLO 监控测试 ===")
+
+    random.seed(7)
+    monitor = SloMonitor(window_seconds=10, slot_seconds=1,
+                         thresholds={'p99': 500, 'min_tps': 95},
+                         on_alert=lambda alert: print(f"  告警: {alert}"))
+
+    # 模拟 32 秒压测：每秒 100 个请求，第 10~15 秒服务变慢，第 20 秒压测机卡顿没有发出请求
+    # 启动阶段和稳定的每秒 100 个请求都不会触发 min_tps 告警
+    events = 0
+    begin = time.perf_counter()
+    for second in range(32):
+        for i in range(0 if second == 20 else 100):
+            slow = 10 <= second < 15
+            latency = random.expovariate(1 / (400 if slow else 80))
+            monitor.record(second + i / 100, latency)
+            events += 1
+        if second % 10 == 9:
+            print(f"第 {second + 1} 秒窗口: {monitor.snapshot()}")
+    cost = time.perf_counter() - begin
+    print(f"处理 {events} 个事件耗时 {cost:.3f}s，平均每个事件 {cost / events * 1e6:.2f} 微秒")
+
+
+if __name__ == "__main__":
+    test_slo_monitor()
@@ -0,0 +1,337 @@
+# 京东测试开发 - 线程安全、支持 asyncio 的双栈队列
+#
+# implement_queue_using_stacks 里的 MyQueue 是教学版本：不是线程安全的，没有容量上限，也不能 await。
+# 这里把它扩展成可复用的队列，保留双栈结构(输入栈 + 输出栈，均摊 O(1))：
+#   - 一把锁保护两个栈，线程间用两个 Condition(非空 / 未满)阻塞等待，接口与 queue.Queue 一致
+#   - maxsize > 0 时限制容量，put 在队列满时阻塞(或超时抛 queue.Full)
+#   - aget / aput 协程在事件循环里等待，不阻塞线程；
+#     另一个线程 put 时通过 loop.call_soon_threadsafe 唤醒等待中的协程，线程和协程可以混用
+#   - pop_many 一次取出多个元素，批量消费时只加一次锁
+# 保留 MyQueue 的 push/pop/peek/empty 接口，pop/peek 在队列为空时返回 None。
+
+import asyncio
+import threading
+import time
+from collections import deque
+from queue import Empty, Full
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class TwoStackQueue:
+    """
+    双栈 FIFO 队列
+    maxsize <= 0 表示不限容量
+    """
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._in = []  # 输入栈
+        self._out = []  # 输出栈，栈顶是队首
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._async_getters = deque()  # 等待元素的协程 (loop, future)
+        self._async_putters = deque()  # 等待空位的协程
+
+    # 以下方法调用时必须持有锁
+    def _size(self):
+        return len(self._in) + len(self._out)
+
+    def _full(self):
+        return 0 < self.maxsize <= self._size()
+
+    def _transfer(self):
+        if not self._out:
+            # 输出栈空了才把输入栈整体倒过去，每个元素最多被搬一次，均摊 O(1)
+            self._in.reverse()
+            self._in, self._out = self._out, self._in
+
+    def _push(self, item):
+        self._in.append(item)
+        self._not_empty.notify()
+        self._wake_one(self._async_getters)
+
+    def _pop(self):
+        self._transfer()
+        item = self._out.pop()
+        self._not_full.notify()
+        self._wake_one(self._async_putters)
+        return item
+
+    @staticmethod
+    def _wake_one(waiters):
+        while waiters:
+            loop, future = waiters.popleft()
+            if not future.done():
+                loop.call_soon_threadsafe(_wake, future)
+                return
+
+    # 线程接口，与 queue.Queue 一致
+    def put(self, item, block=True, timeout=None):
+        with self._not_full:
+            if self._full():
+                if not block:
+                    raise Full
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._full():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Full
+                    self._not_full.wait(remaining)
+            self._push(item)
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not self._size():
+                if not block:
+                    raise Empty
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self._size():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            return self._pop()
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def pop_many(self, max_items=None, block=False, timeout=None):
+        """
+        按 FIFO 顺序一次取出最多 max_items 个元素(None 表示全部)
+        block 为 True 时至少等到一个元素；队列为空且不等待时返回 []
+        """
+        with self._not_empty:
+            if block:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self._size():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return []
+                    self._not_empty.wait(remaining)
+            size = self._size()
+            count = size if max_items is None else min(max_items, size)
+            self._transfer()
+            out = self._out
+            if count <= len(out):
+                items = out[:-count - 1:-1] if count else []
+                del out[len(out) - count:]
+            else:
+                # 输出栈不够，剩下的从输入栈底部取
+                rest = count - len(out)
+                items = out[::-1] + self._in[:rest]
+                out.clear()
+                del self._in[:rest]
+            for _ in range(min(count, len(self._async_putters))):
+                self._wake_one(self._async_putters)
+            if count:
+                self._not_full.notify(count)
+            return items
+
+    # asyncio 接口
+    async def aput(self, item):
+        while True:
+            with self._lock:
+                if not self._full():
+                    self._push(item)
+                    return
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._async_putters.append((loop, future))
+            await self._wait(future, self._async_putters)
+
+    async def aget(self):
+        while True:
+            with self._lock:
+                if self._size():
+                    return self._pop()
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._async_getters.append((loop, future))
+            await self._wait(future, self._async_getters)
+
+    async def _wait(self, future, waiters):
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                for i, (_, waiting) in enumerate(waiters):
+                    if waiting is future:
+                        del waiters[i]  # 还没被唤醒，直接移出等待队列，取消的等待者不会堆积
+                        break
+                else:
+                    # 已经被 _wake_one 选中(唤醒可能还没执行)却被取消了，把这次唤醒转给下一个等待者
+                    self._wake_one(waiters)
+            raise
+
+    # MyQueue 兼容接口
+    def push(self, x):
+        self.put(x)
+
+    def pop(self):
+        with self._lock:
+            return self._pop() if self._size() else None
+
+    def peek(self):
+        with self._lock:
+            if not self._size():
+                return None
+            self._transfer()
+            return self._out[-1]
+
+    def empty(self):
+        with self._lock:
+            return not self._size()
+
+    def qsize(self):
+        with self._lock:
+            return self._size()
+
+    def __len__(self):
+        return self.qsize()
+
+
+def benchmark_queues(items=200000, producers=4, consumers=4, maxsize=1000, batch=64):
+    """多生产者/多消费者吞吐量对比：TwoStackQueue(逐个/批量消费)、queue.Queue、collections.deque"""
+    import queue
+
+    per_producer = items // producers
+    total = per_producer * producers
+    stop = object()
+
+    def run(make_queue, produce, consume, put_stop):
+        q = make_queue()
+        counts = []
+        threads = [threading.Thread(target=produce, args=(q,)) for _ in range(producers)]
+        threads += [threading.Thread(target=lambda: counts.append(consume(q))) for _ in range(consumers)]
+        begin = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads[:producers]:
+            t.join()
+        for _ in range(consumers):
+            put_stop(q, stop)
+        for t in threads[producers:]:
+            t.join()
+        elapsed = time.perf_counter() - begin
+        if sum(counts) != total:
+            raise RuntimeError(f"lost items: {sum(counts)} != {total}")
+        return total / elapsed
+
+    def produce_blocking(q):
+        put = q.put
+        for i in range(per_producer):
+            put(i)
+
+    def consume_blocking(q):
+        get, count = q.get, 0
+        while get() is not stop:
+            count += 1
+        return count
+
+    def consume_batches(q):
+        count = 0
+        while True:
+            items = q.pop_many(batch, block=True)
+            for i, item in enumerate(items):
+                if item is stop:
+                    # 结束标记之后只会有其他消费者的结束标记，放回去
+                    for _ in range(len(items) - i - 1):
+                        q.put(stop)
+                    return count
+                count += 1
+
+    def produce_deque(q):
+        # deque 没有容量上限和阻塞，满了只能轮询
+        append = q.append
+        for i in range(per_producer):
+            while len(q) >= maxsize:
+                time.sleep(0)
+            append(i)
+
+    def consume_deque(q):
+        popleft, count = q.popleft, 0
+        while True:
+            try:
+                item = popleft()
+            except IndexError:
+                time.sleep(0)
+                continue
+            if item is stop:
+                return count
+            count += 1
+
+    rows = {}
+    for name, make_queue, produce, consume, put_stop in (
+            ('TwoStackQueue', lambda: TwoStackQueue(maxsize), produce_blocking, consume_blocking, TwoStackQueue.put),
+            ('TwoStackQueue.pop_many', lambda: TwoStackQueue(maxsize), produce_blocking, consume_batches,
+             TwoStackQueue.put),
+            ('queue.Queue', lambda: queue.Queue(maxsize), produce_blocking, consume_blocking, queue.Queue.put),
+            ('collections.deque', deque, produce_deque, consume_deque, deque.append)):
+        rows[name] = run(make_queue, produce, consume, put_stop)
+        print(f"{name:<24} {rows[name]:>12,.0f} 个/秒")
+    return rows
+
+
+# 测试用例
+def test_stack_queue():
+    print("=== 线程安全、支持 asyncio 的双栈队列测试 ===")
+
+    q = TwoStackQueue()
+    for i in range(1, 4):
+        q.push(i)
+    print(f"peek: {q.peek()}, pop: {q.pop()}, pop: {q.pop()}, empty: {q.empty()}")
+    for i in range(4, 9):
+        q.push(i)
+    print(f"pop_many(4): {q.pop_many(4)}, 剩余: {q.pop_many()}")
+
+    bounded = TwoStackQueue(maxsize=2)
+    bounded.put(1)
+    bounded.put(2)
+    try:
+        bounded.put(3, timeout=0.05)
+    except Full:
+        print("容量为 2 的队列第 3 次 put 超时抛出 queue.Full")
+
+    # 协程消费、线程生产
+    async def consume(queue, count):
+        return [await queue.aget() for _ in range(count)]
+
+    async def main():
+        queue = TwoStackQueue(maxsize=3)
+        producer = threading.Thread(target=lambda: [queue.put(i) for i in range(20)])
+        producer.start()
+        result = await consume(queue, 20)
+        producer.join()
+        await queue.aput('async')
+        return result, queue.get()
+
+    result, last = asyncio.run(main())
+    print(f"协程按序收到线程生产的 20 个元素: {result == list(range(20))}, aput 后 get: {last}")
+
+    # 被唤醒的协程在唤醒执行前就被取消(比如 wait_for 超时)，元素要交给下一个等待者
+    async def cancelled_handoff():
+        queue = TwoStackQueue()
+        first, second, third = (asyncio.ensure_future(queue.aget()) for _ in range(3))
+        await asyncio.sleep(0)
+        queue.put('x')
+        first.cancel()  # 已被选中唤醒
+        third.cancel()  # 还在等待队列中
+        return await asyncio.wait_for(second, 1), len(queue._async_getters)
+
+    item, pending = asyncio.run(cancelled_handoff())
+    print(f"唤醒前被取消: 下一个等待者收到 {item!r}, 等待队列剩余 {pending} 个")
+
+    print("\n多生产者/多消费者吞吐量:")
+    benchmark_queues(items=100000)
+
+
+if __name__ == "__main__":
+    test_stack_queue()
@@ -0,0 +1,187 @@
+# 京东测试开发 - 多行异常堆栈指纹聚类
+#
+# find_error_patterns 按单行关键字计数，一个 Java 异常堆栈有几十行，
+# 要么被重复计数(Caused by 里又出现一次异常名)，要么同一个问题的不同堆栈没法归到一起。
+# 这里流式地把多行堆栈拼成一条记录，再做归一化和指纹：
+#   1. 拼接：出现异常类名的行开始一条记录，后面的 "\tat ..."、"Caused by: ..."、"... N more" 行都属于它
+#   2. 归一化：十六进制地址、UUID、数字等每次都会变的内容替换成占位符
+#   3. 指纹：异常类名 + 前若干个栈帧做哈希，同一个代码位置抛出的异常得到同一个指纹
+#   4. 统计每个指纹的次数、第一次和最后一次出现的时间/行号
+# 内存有上界：单条堆栈最多保留 max_frames 行；不同指纹超过 2 * max_fingerprints 个时，
+# 只保留次数最多的 max_fingerprints 个，被淘汰的次数累计在 evicted 中。
+
+import hashlib
+import re
+
+from test_scenario_algorithms import TIME_PATTERN
+
+EXCEPTION_PATTERN = re.compile(
+    r'((?:[a-zA-Z_$][\w$]*\.)*[A-Z][\w$]*(?:Exception|Error|Throwable))(?=:|\s|$)')
+CONTINUATION_PATTERN = re.compile(r'^\s+at |^\s*Caused by:|^\s+\.\.\. \d+ (?:more|common frames omitted)|^\s*Suppressed:')
+FRAME_PATTERN = re.compile(r'^\s+at ')
+
+# 归一化规则，顺序有关：先替换长的模式，再替换数字
+VOLATILE_PATTERNS = [
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<UUID>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<HEX>'),
+    (re.compile(r'@[0-9a-fA-F]{4,}\b'), '@<HEX>'),
+    (re.compile(r'\b[0-9a-fA-F]{16,}\b'), '<ID>'),
+    (re.compile(r'\d+'), '<NUM>'),
+]
+
+
+def normalize_line(line):
+    """把一行中每次运行都会变化的内容替换成占位符"""
+    line = line.strip()
+    for pattern, placeholder in VOLATILE_PATTERNS:
+        line = pattern.sub(placeholder, line)
+    return line
+
+
+class StackTraceClusterer:
+    """
+    流式堆栈聚类
+    feed() 逐行输入日志，finish() 结束最后一条堆栈，report() 输出按次数排序的指纹统计
+    fingerprint_frames: 参与指纹计算的栈帧数，越少越容易把同一位置的不同调用链归到一起
+    """
+
+    def __init__(self, max_fingerprints=10000, max_frames=50, fingerprint_frames=10):
+        self.max_fingerprints = max_fingerprints
+        self.max_frames = max_frames
+        self.fingerprint_frames = fingerprint_frames
+        self.clusters = {}  # 指纹 -> 统计信息
+        self.evicted = 0    # 因内存上限被淘汰的堆栈次数
+        self.line_no = 0
+        self._current = None  # 正在拼接的堆栈
+        self._last_time = None  # 最近一行带时间戳的日志时间
+
+    def feed(self, line):
+        self.line_no += 1
+        if self._current is not None and CONTINUATION_PATTERN.match(line):
+            trace = self._current
+            if len(trace['lines']) < self.max_frames:
+                trace['lines'].append(line)
+            return
+
+        self.finish()
+        stamp = TIME_PATTERN.search(line)
+        if stamp is not None:
+            self._last_time = stamp.group(0)
+        if EXCEPTION_PATTERN.search(line):
+            # 时间戳可能在异常行本身，也可能在它前面那一行 ERROR 日志里
+            self._current = {'lines': [line], 'line_no': self.line_no, 'time': self._last_time}
+
+    def feed_lines(self, lines):
+        for line in lines:
+            self.feed(line)
+        self.finish()
+        return self
+
+    def fingerprint(self, lines):
+        """异常类名(包括 Caused by) + 前 fingerprint_frames 个栈帧归一化后做哈希"""
+        classes = []
+        frames = []
+        for line in lines:
+            if FRAME_PATTERN.match(line):
+                if len(frames) < self.fingerprint_frames:
+                    frames.append(normalize_line(line))
+            else:
+                match = EXCEPTION_PATTERN.search(line)
+                if match:
+                    classes.append(match.group(1))
+        # 没有栈帧的单行异常，用归一化后的整行区分
+        key_parts = classes + frames if frames else classes + [normalize_line(EXCEPTION_PATTERN.split(lines[0], 1)[-1])]
+        return hashlib.sha1('\n'.join(key_parts).encode('utf-8')).hexdigest()[:16], classes
+
+    def finish(self):
+        """结束当前正在拼接的堆栈并计入统计"""
+        trace, self._current = self._current, None
+        if trace is None:
+            return
+
+        key, classes = self.fingerprint(trace['lines'])
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            cluster = self.clusters[key] = {
+                'fingerprint': key,
+                'exception': classes[0] if classes else None,
+                'root_cause': classes[-1] if classes else None,
+                'count': 0,
+                'first_seen': trace['time'],
+                'first_line': trace['line_no'],
+                'sample': [normalize_line(line) for line in trace['lines'][:5]],
+            }
+        # 先计数再淘汰：新指纹如果被淘汰，这一次也计入 evicted，不会丢失
+        cluster['count'] += 1
+        cluster['last_seen'] = trace['time']
+        cluster['last_line'] = trace['line_no']
+        if len(self.clusters) > 2 * self.max_fingerprints:
+            self._evict()
+
+    def _evict(self):
+        """只保留次数最多的 max_fingerprints 个指纹，均摊下来每条堆栈 O(log n)"""
+        import heapq
+
+        keep = heapq.nlargest(self.max_fingerprints, self.clusters.values(), key=lambda c: c['count'])
+        kept = {cluster['fingerprint'] for cluster in keep}
+        for key in list(self.clusters):
+            if key not in kept:
+                self.evicted += self.clusters.pop(key)['count']
+
+    def report(self, top=None):
+        clusters = sorted(self.clusters.values(), key=lambda c: c['count'], reverse=True)
+        return clusters[:top] if top else clusters
+
+
+def cluster_stack_traces(log_lines, top=None, **options):
+    """对日志行做堆栈聚类，返回按次数排序的指纹统计"""
+    return StackTraceClusterer(**options).feed_lines(log_lines).report(top)
+
+
+# 测试用例
+def test_stack_trace_clustering():
+    print("=== 多行异常堆栈指纹聚类测试 ===")
+
+    def npe(user_id, address):
+        return [
+            f"2024-01-15 14:{user_id % 60:02d}:00 ERROR Request failed for user {user_id}",
+            f"java.lang.NullPointerException: user {user_id} not found at 0x{address:x}",
+            "\tat com.example.UserService.getUser(UserService.java:42)",
+            "\tat com.example.UserController.detail(UserController.java:18)",
+        ]
+
+    def sql(order_id):
+        return [
+            "2024-01-15 15:00:00 ERROR Order query failed",
+            f"org.springframework.jdbc.UncategorizedSQLException: order {order_id}",
+            "\tat com.example.OrderDao.query(OrderDao.java:88)",
+            "Caused by: java.sql.SQLException: Connection timeout after 3000ms",
+            "\tat com.mysql.jdbc.ConnectionImpl.connect(ConnectionImpl.java:1024)",
+            "\t... 12 more",
+        ]
+
+    lines = []
+    for i in range(5):
+        lines += npe(1000 + i, 0x7f3a2c00 + i)
+        lines += ["2024-01-15 14:30:00 INFO Order processed successfully"]
+        lines += sql(900000 + i)
+
+    for cluster in cluster_stack_traces(lines):
+        print(f"{cluster['fingerprint']} x{cluster['count']} {cluster['exception']} "
+              f"(root cause: {cluster['root_cause']}) "
+              f"first={cluster['first_seen']} last={cluster['last_seen']}")
+        print(f"  {cluster['sample'][0]}")
+
+    # 内存上限：大量不同的异常只保留次数最多的若干个
+    clusterer = StackTraceClusterer(max_fingerprints=10)
+    for i in range(1000):
+        clusterer.feed(f"com.example.Error{i % 100}Exception: boom")
+        clusterer.feed("\tat com.example.Main.run(Main.java:1)")
+    clusterer.finish()
+    retained = sum(cluster['count'] for cluster in clusterer.clusters.values())
+    print(f"保留指纹数: {len(clusterer.clusters)}, 保留的次数: {retained}, 被淘汰的次数: {clusterer.evicted}, "
+          f"合计等于堆栈总数: {retained + clusterer.evicted == 1000}")
+
+
+if __name__ == "__main__":
+    test_stack_trace_clustering()
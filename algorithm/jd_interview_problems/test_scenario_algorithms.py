@@ -1,50 +1,77 @@
 # 京东测试开发面试 - 测试场景算法题
 
+import re
+
+# 时间戳正则表达式(只在快速路径不命中时使用)
+TIME_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}')
+
+def find_timestamp(line):
+    """
+    返回日志行中 YYYY-MM-DD HH:MM:SS 时间戳的起始下标，没有时返回 -1
+    绝大多数日志以时间戳开头，按固定位置判断即可，不用进正则引擎
+    """
+    if (len(line) >= 19 and line[4] == '-' and line[7] == '-' and line[10] == ' '
+            and line[13] == ':' and line[16] == ':'
+            and (line[0:4] + line[5:7] + line[8:10] + line[11:13]
+                 + line[14:16] + line[17:19]).isdecimal()):
+        return 0
+
+    # 时间戳不在行首时退回正则搜索
+    match = TIME_PATTERN.search(line)
+    return match.start() if match else -1
+
+def extract_log_hour(line):
+    """
+    提取日志行中的小时(YYYY-MM-DD HH)
+    """
+    start = find_timestamp(line)
+    return line[start:start + 13] if start >= 0 else None
+
 def analyze_log_times(log_lines):
     """
     分析日志时间戳，统计每小时的日志数量
     京东面试常考：日志分析相关算法
+    log_lines 可以是列表，也可以是任意行迭代器(如 log_reader.iter_log_lines)
     """
     from collections import defaultdict
-    import re
     
     # 存储每小时日志数量
     hourly_count = defaultdict(int)
     
-    # 时间戳正则表达式
-    time_pattern = r'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}'
-    
     for line in log_lines:
-        match = re.search(time_pattern, line)
-        if match:
-            hour = match.group(1)
+        hour = extract_log_hour(line)
+        if hour is not None:
             hourly_count[hour] += 1
     
     return dict(hourly_count)
 
-def find_error_patterns(log_lines):
+def analyze_log_file(path, chunk_size=None):
+    """
+    流式分析大日志文件的每小时日志数量
+    按字节块读取，内存占用与文件大小无关
+    """
+    from log_reader import DEFAULT_CHUNK_SIZE, iter_log_lines
+    
+    lines = iter_log_lines(path, chunk_size or DEFAULT_CHUNK_SIZE)
+    return analyze_log_times(lines)
+
+def find_error_patterns(log_lines, registry=None):
     """
     查找错误日志模式
     统计不同类型的错误出现频次
+    所有模式预先编译成一个匹配器，每行只扫描一遍，先注册的模式优先命中
+    registry 可传入自定义的 ErrorPatternRegistry，默认使用内置的 5 种错误
     """
     from collections import defaultdict
-    import re
-    
-    error_patterns = {
-        'NullPointerException': r'NullPointerException',
-        'ArrayIndexOutOfBounds': r'ArrayIndexOutOfBoundsException',
-        'FileNotFound': r'FileNotFoundException',
-        'SQLException': r'SQLException',
-        'Timeout': r'TimeoutException|timeout'
-    }
+    from error_pattern_matcher import default_error_registry
     
+    matcher = registry or default_error_registry()
     error_count = defaultdict(int)
     
     for line in log_lines:
-        for error_type, pattern in error_patterns.items():
-            if re.search(pattern, line, re.IGNORECASE):
-                error_count[error_type] += 1
-                break
+        error_type = matcher.match(line)
+        if error_type is not None:
+            error_count[error_type] += 1
     
     return dict(error_count)
 
@@ -80,7 +107,11 @@ def validate_data_format(data_list, expected_format):
     """
     验证数据格式
     测试数据校验算法
+    校验规则在 data_validation.py 中预编译；大批量数据请用 validate_batch，避免逐条创建结果字典
     """
+    from data_validation import ERROR_MESSAGES, get_format_checker
+    
+    checker = get_format_checker(expected_format)
     validation_results = []
     
     for i, data in enumerate(data_list):
@@ -92,59 +123,32 @@ def validate_data_format(data_list, expected_format):
         }
         
         # 格式验证
-        if expected_format == 'email':
-            import re
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, data):
-                result['is_valid'] = False
-                result['errors'].append('Invalid email format')
-        
-        elif expected_format == 'phone':
-            import re
-            phone_pattern = r'^1[3-9]\d{9}$'
-            if not re.match(phone_pattern, data):
-                result['is_valid'] = False
-                result['errors'].append('Invalid phone format')
-        
-        elif expected_format == 'date':
-            try:
-                from datetime import datetime
-                datetime.strptime(data, '%Y-%m-%d')
-            except ValueError:
-                result['is_valid'] = False
-                result['errors'].append('Invalid date format, expected YYYY-MM-DD')
+        if checker is not None and not checker(data):
+            result['is_valid'] = False
+            result['errors'].append(ERROR_MESSAGES[expected_format])
         
         validation_results.append(result)
     
     return validation_results
 
-def performance_test_analysis(response_times):
+def performance_test_analysis(response_times, backend='auto'):
     """
     性能测试结果分析
     计算性能指标
+    传入 latency_sketch.LatencySketch 时走流式估计模式，不需要全部样本都在内存中
+    response_times 也可以是 array.array / memoryview / NumPy 数组，
+    安装了 numpy 时自动走向量化后端(见 perf_backends.py)，否则排序一次后用纯 Python 计算
+    注意 tps 按请求串行执行估算，并发压测的真实吞吐量请用 slo_monitor.SloMonitor 统计
     """
-    if not response_times:
-        return {}
-    
-    import statistics
-    
-    analysis = {
-        'total_requests': len(response_times),
-        'min_response_time': min(response_times),
-        'max_response_time': max(response_times),
-        'avg_response_time': statistics.mean(response_times),
-        'median_response_time': statistics.median(response_times),
-        'p90_response_time': statistics.quantiles(response_times, n=10)[8],  # 90分位数
-        'p95_response_time': statistics.quantiles(response_times, n=20)[18], # 95分位数
-        'p99_response_time': statistics.quantiles(response_times, n=100)[98], # 99分位数
-    }
+    from latency_sketch import LatencySketch
+    from perf_backends import analyze_response_times
     
-    # 计算TPS (Transactions Per Second)
-    total_time = sum(response_times) / 1000  # 转换为秒
-    if total_time > 0:
-        analysis['tps'] = len(response_times) / total_time
+    if isinstance(response_times, LatencySketch):
+        return response_times.summary()
+    if len(response_times) == 0:
+        return {}
     
-    return analysis
+    return analyze_response_times(response_times, backend)
 
 # 测试用例
 def test_scenario_algorithms():
@@ -162,6 +166,18 @@ def test_scenario_algorithms():
     hourly_stats = analyze_log_times(log_lines)
     print(f"每小时日志统计: {hourly_stats}")
     
+    # 大文件场景：写入临时文件后按块流式分析
+    import os
+    import tempfile
+    fd, log_path = tempfile.mkstemp(suffix='.log')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(log_lines) + '\n')
+        file_stats = analyze_log_file(log_path, chunk_size=16)
+        print(f"流式分析结果一致: {file_stats == hourly_stats}")
+    finally:
+        os.remove(log_path)
+    
     # 测试2：错误模式分析
     print("\n2. 错误模式分析测试")
     error_logs = [
@@ -192,6 +208,12 @@ def test_scenario_algorithms():
     print(f"性能分析结果:")
     for key, value in performance_stats.items():
         print(f"  {key}: {value}")
+    
+    # 流式估计模式：样本逐个加入直方图，内存占用恒定
+    from latency_sketch import LatencySketch
+    sketch = LatencySketch().add_many(response_times)
+    sketch_stats = performance_test_analysis(sketch)
+    print(f"流式估计 p95: {sketch_stats['p95_response_time']:.1f}, p99.9: {sketch_stats['p999_response_time']:.1f}")
 
 if __name__ == "__main__":
     test_scenario_algorithms()
\ No newline at end of file